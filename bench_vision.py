@@ -0,0 +1,119 @@
+"""Benchmark: per-frame latency and allocations of the video.py tracker hot loop on a synthetic course.
+
+No camera needed. Renders a bird's-eye course (red path, cardboard boxes, green robot moving along the
+path), projects it into a tilted camera view, then times warp -> detect -> collision -> draw per frame.
+Allocation numbers come from tracemalloc (numpy and OpenCV output arrays are traced):
+  peak transient = most memory held at once above the frame-start baseline, per frame
+  large allocs   = allocation sites that grew by >= 64 KiB over the measured frames
+
+  python bench_vision.py [--frames 300] [--warmup 20] [--static] [--roi {none,velocity,kalman}]
+
+--static measures static-scene mode (path/obstacles cached after calibration, robot + collision per frame).
+--roi searches for the robot only in a window around its predicted position.
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Ensure project root is on path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from video import SimpleObstacleCourseTracker
+
+CAMERA_SIZE = (1280, 720)
+LARGE_ALLOC_BYTES = 64 * 1024
+
+
+def make_course(tracker, n_frames=30):
+    """Return (camera_frames, camera_corners). Robot position differs per frame; the course is static."""
+    w, h = tracker.mapped_size
+    board = np.full((h, w, 3), 170, np.uint8)  # below the tracker's "bright robot" V threshold
+    path = np.array([[150, 1100], [150, 700], [650, 500], [650, 100]], np.int32)
+    cv2.polylines(board, [path], False, (30, 30, 200), 40)
+    for x, y in ((320, 760), (500, 380), (180, 300)):
+        cv2.rectangle(board, (x, y), (x + 90, y + 70), (60, 110, 160), -1)
+    corners = np.float32([[300, 40], [980, 40], [1220, 700], [60, 700]])
+    board_corners = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+    to_camera = cv2.getPerspectiveTransform(board_corners, corners)
+    frames = []
+    for i in range(n_frames):
+        scene = board.copy()
+        t = i / n_frames
+        cx, cy = int(150 + 500 * t), int(1100 - 1000 * t)
+        cv2.circle(scene, (cx, cy), 25, (40, 200, 40), -1)
+        frames.append(cv2.warpPerspective(scene, to_camera, CAMERA_SIZE, borderValue=(90, 90, 90)))
+    return frames, corners
+
+
+def process(tracker, frame):
+    warped = tracker.warp_to_birds_eye(frame)
+    tracker.update_scene(warped)
+    robot_pos, robot_contour, _ = tracker.locate_robot(warped)
+    if robot_pos:
+        tracker.check_obstacle_collision(robot_pos, robot_contour)
+    return tracker.draw_visualization(warped, robot_pos, robot_contour)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--static", action="store_true", help="static-scene mode")
+    parser.add_argument("--roi", choices=("none", "velocity", "kalman"), help="ROI robot tracking predictor")
+    args = parser.parse_args()
+
+    tracker = SimpleObstacleCourseTracker()
+    if args.roi:
+        tracker.enable_roi_tracking(predictor=args.roi)
+    frames, corners = make_course(tracker)
+    tracker.track_corners = corners
+    tracker.compute_homography()
+    if args.static:
+        tracker.build_static_scene(tracker.warp_to_birds_eye(f) for f in frames[:10])
+
+    for i in range(args.warmup):
+        process(tracker, frames[i % len(frames)])
+
+    latencies = []
+    for i in range(args.frames):
+        t0 = time.perf_counter()
+        process(tracker, frames[i % len(frames)])
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    process(tracker, frames[0])
+    before = tracemalloc.take_snapshot()
+    peaks = []
+    for i in range(args.frames):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        process(tracker, frames[i % len(frames)])
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    large = [d for d in after.compare_to(before, "lineno") if d.size_diff >= LARGE_ALLOC_BYTES]
+
+    latencies.sort()
+    print(f"mode: {'static scene' if args.static else 'detect every frame'}  "
+          f"scene detections during run: {tracker.scene_redetections}"
+          + (f"  roi: {args.roi}, last window {tracker.robot_tracker.roi_fraction:.1%} of frame, "
+             f"full searches {tracker.robot_tracker.full_searches}" if args.roi else ""))
+    print(f"frames: {args.frames}  camera: {CAMERA_SIZE[0]}x{CAMERA_SIZE[1]}  "
+          f"bird's-eye: {tracker.mapped_size[0]}x{tracker.mapped_size[1]}")
+    print(f"latency ms: mean {statistics.mean(latencies):.2f}  p50 {latencies[len(latencies) // 2]:.2f}  "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.2f}  -> {1000 / statistics.mean(latencies):.0f} fps")
+    print(f"peak transient alloc per frame: mean {statistics.mean(peaks) / 1024:.1f} KiB  "
+          f"max {max(peaks) / 1024:.1f} KiB")
+    print(f"large allocs retained (>= {LARGE_ALLOC_BYTES // 1024} KiB): {len(large)}")
+    for d in large[:5]:
+        print(f"  {d}")
+
+
+if __name__ == "__main__":
+    main()
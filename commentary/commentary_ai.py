@@ -1,5 +1,8 @@
 """Gemini commentary from match telemetry (OpenRouter)."""
 import json
+import re
+from typing import Iterator
+
 from openai import OpenAI
 
 SYSTEM_PROMPT = """You are a live commentator for a timed obstacle-course run. This is NOT head-to-head competition: one robot runs the track by itself. There is no "victory" or "winner"—comment on the robot's performance (time, clean run, box placement, finishing under 60s).
@@ -13,6 +16,23 @@ Scoring: Obstacles are BAD—during the match each touch subtracts 1 (score_brea
 When match_ended is true (usually the last payload), end with a clear wrap-up line for the run (e.g. "That's the run!", "Performance complete."). Do not rate or judge scores (e.g. avoid phrases like "a great score of X points")—state the score or context neutrally without evaluative language. Base commentary only on the data given; do not invent. Output plain text only: 1-2 short lines, no JSON, no bullet points."""
 
 
+# End of a sentence: terminal punctuation (plus closing quotes/brackets) followed by whitespace, or a line break.
+# "1.5s" or "4:55" do not match, so numbers are not split.
+_SENTENCE_END = re.compile(r"[.!?\u2026]+[\"'\u201d\u2019)\]]*\s+|\n+")
+
+
+def split_sentences(text: str) -> tuple[list[str], str]:
+    """Split streamed text into complete sentences and the unfinished remainder."""
+    sentences = []
+    start = 0
+    for m in _SENTENCE_END.finditer(text):
+        sentence = text[start:m.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = m.end()
+    return sentences, text[start:]
+
+
 class CommentaryAI:
     """Generate commentary from payload(s) via Gemini (OpenRouter)."""
 
@@ -23,19 +43,43 @@ class CommentaryAI:
         )
         self.model = model
 
+    def _messages(self, payload_or_list: dict | list[dict]) -> list[dict]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps(payload_or_list)},
+        ]
+
+    def stream_commentary(self, payload_or_list: dict | list[dict]) -> Iterator[str]:
+        """Like generate_commentary, but streams the completion and yields each sentence as soon as it is
+        complete, so TTS can start on the first one while the rest is still being generated.
+        Errors are logged and end the stream (nothing is spoken for them)."""
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(payload_or_list),
+                temperature=0.7,
+                stream=True,
+            )
+            pending = ""
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                sentences, pending = split_sentences(pending + delta)
+                yield from sentences
+            if pending.strip():
+                yield pending.strip()
+        except Exception as e:
+            print(f"[Commentary] Streaming error: {e}")
+
     def generate_commentary(self, payload_or_list: dict | list[dict]) -> str:
         """Single payload dict or list of payloads (chronological). Returns 1-2 hype lines."""
-        if isinstance(payload_or_list, list):
-            body = json.dumps(payload_or_list)
-        else:
-            body = json.dumps(payload_or_list)
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": body},
-                ],
+                messages=self._messages(payload_or_list),
                 temperature=0.7,
             )
             return (response.choices[0].message.content or "").strip()
@@ -1,17 +1,40 @@
-"""Buffer payloads, rate-limit, drain 2+ to Gemini, then TTS."""
+"""Buffer payloads, rate-limit, answer common events from templates and the rest with Gemini, streaming its
+sentences straight into TTS. One worker thread per runner, woken by push(); request handlers only enqueue."""
+import queue
 import time
 import threading
 from collections import deque
 from .commentary_ai import CommentaryAI
-from .tts import TTSSpeaker
-
-# Same neutral intro every time (like real sports commentators).
-INTRO_LINE = "And we're off!" #This should happen when the timer starts
+from .templates import INTRO_LINE, MINUTE_MARK_S, diff_lines, score_line  # INTRO_LINE is spoken when the timer starts
+from .tts import TTSSpeaker, Utterance
 
 
 class CommentaryRunner:
     """Hold payloads; when notable_event or FILLER_INTERVAL, drain up to N and commentate + TTS.
-    Stops generating after a payload with match_ended true has been processed (wrap-up only)."""
+    Stops generating after a payload with match_ended true has been processed (wrap-up only).
+    Commentary is streamed: each sentence goes to TTS as soon as Gemini finishes it, and its audio plays as
+    it is synthesised. stats() reports time to first audio (from the start of generation, and from the
+    push of the newest payload in the batch).
+
+    run_loop() sleeps on a condition variable: push() / play_intro() wake it immediately, and it otherwise
+    only wakes when the filler interval is due. New lines are generated while the previous one is still
+    playing (their audio queues behind it), up to max_queued_audio_sec of audio ahead.
+
+    Each batch is diffed against the last payload spoken about (templates.diff_lines). Touches, box drops
+    and the 60 s mark get a template line at once, with no Gemini call. Gemini is only asked for filler
+    color (nothing template-worthy changed) and the match-end wrap-up. If its first sentence takes longer
+    than llm_budget_sec, the template lines (or the score) are spoken instead and the reply is dropped.
+
+    Scheduling: payloads are full state snapshots, so only the newest matters. The buffer keeps at most
+    max_payloads_per_call of them (older ones are superseded), and a batch drains the whole buffer and
+    is diffed as one delta. Payloads older than stale_after_sec when drained are dropped; their changes
+    still show up in the next diff. A match_ended payload skips the queued-audio limit and cuts off any
+    filler still playing, so the wrap-up is never stuck behind filler.
+
+    The 60 s mark does not depend on a push arriving: play_intro() (the timer start) schedules a wake at
+    MINUTE_MARK_S, and if no payload has reached it by then the worker queues a copy of the newest one with
+    the clock at the mark, so MINUTE_LINE is spoken on time.
+    """
 
     def __init__(
         self,
@@ -19,52 +42,206 @@ class CommentaryRunner:
         tts: TTSSpeaker,
         filler_interval_sec: float = 12.0,
         max_payloads_per_call: int = 3,
+        max_queued_audio_sec: float = 4.0,
+        llm_budget_sec: float = 2.0,
+        stale_after_sec: float = 5.0,
     ):
         self.commentary_ai = commentary_ai
         self.tts = tts
         self.filler_interval_sec = filler_interval_sec
         self.max_payloads_per_call = max_payloads_per_call
-        self._buffer: deque[dict] = deque()
+        self.max_queued_audio_sec = max_queued_audio_sec
+        self.llm_budget_sec = llm_budget_sec
+        self.stale_after_sec = stale_after_sec
+        self._buffer: deque[tuple[float, dict]] = deque()  # (monotonic push time, payload)
         self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
         self._last_commentary_time = 0.0
         self._in_flight = False
         self._stop = threading.Event()
         self._match_ended_done = False  # True after we've spoken for a match_ended payload
         self._intro_done = False
+        self._intro_pending = False
+        self._minute_due_at: float | None = None  # monotonic time the match clock reaches MINUTE_MARK_S
+        self._last_payload: dict | None = None  # newest payload already commented on (diff base)
+        self._filler_queued = False  # the last thing sent to TTS was Gemini filler
+        # (utterance, push time, what was spoken) until its first audio, for metrics
+        self._awaiting_audio: list[tuple[Utterance, float, str]] = []
+        self.utterances = 0
+        self.last_ttfa_s: float | None = None
+        self.avg_ttfa_s: float | None = None
+        self.last_event_to_audio_s: float | None = None
+        self.last_first_sentence_s: float | None = None
+        self.template_utterances = 0
+        self.llm_calls = 0
+        self.llm_fallbacks = 0
+        self.superseded = 0
+        self.dropped_stale = 0
 
     def push(self, payload: dict) -> None:
-        with self._lock:
-            self._buffer.append(payload)
+        with self._wake:
+            self._buffer_locked(payload)
+            if payload.get("match_ended") and self._filler_queued:
+                self.tts.stop()  # cut filler still being spoken or synthesised; the wrap-up goes next
+            self._wake.notify()
+
+    def _buffer_locked(self, payload: dict) -> None:
+        """Caller holds _lock."""
+        self._buffer.append((time.monotonic(), payload))
+        while len(self._buffer) > self.max_payloads_per_call:
+            self._buffer.popleft()  # superseded: the newer snapshots carry its changes
+            self.superseded += 1
 
     def reset_for_new_match(self) -> None:
-        """Call when timer is reset / new match started. Allows commentary again; clears buffered payloads."""
+        """Call when timer is reset / new match started. Allows commentary (and the intro) again; clears
+        buffered payloads."""
         with self._lock:
             self._match_ended_done = False
+            self._intro_done = False
+            self._minute_due_at = None
+            self._last_payload = None
             self._buffer.clear()
 
     def play_intro(self) -> None:
-        """Play the same neutral intro once (call at startup)."""
-        with self._lock:
+        """Queue the same neutral intro, once per match, and start counting to the minute mark. Returns
+        immediately; the worker speaks it."""
+        with self._wake:
             if self._intro_done:
                 return
             self._intro_done = True
-        self.tts.speak(INTRO_LINE)
+            self._intro_pending = True
+            self._minute_due_at = time.monotonic() + MINUTE_MARK_S
+            self._wake.notify()
+
+    def match_stopped(self) -> None:
+        """Call when the timer is stopped: the clock is frozen, so it never reaches the minute mark."""
+        with self._wake:
+            self._minute_due_at = None
+            self._wake.notify()
+
+    def stop(self) -> None:
+        """End run_loop."""
+        with self._wake:
+            self._stop.set()
+            self._wake.notify()
+
+    def _due_locked(self) -> bool:
+        """Caller holds _lock."""
+        if self._match_ended_done or self._in_flight or not self._buffer:
+            return False
+        if self._buffer[-1][1].get("match_ended"):
+            return True
+        if self.tts.queued_seconds() > self.max_queued_audio_sec:
+            return False
+        if any(p.get("notable_event") for _, p in self._buffer):
+            return True
+        return (time.time() - self._last_commentary_time) >= self.filler_interval_sec
 
     def _should_run(self) -> bool:
         with self._lock:
-            if self._match_ended_done or self._in_flight:
-                return False
-            if not self._buffer:
-                return False
-            any_notable = any(p.get("notable_event") for p in self._buffer)
-            if any_notable:
-                return True
-            return (time.time() - self._last_commentary_time) >= self.filler_interval_sec
-
-    def _drain(self) -> list[dict]:
+            return self._due_locked()
+
+    def _wait_timeout_locked(self, poll_interval: float) -> float | None:
+        """How long the worker may sleep if nothing is pushed. Caller holds _lock."""
+        if self._match_ended_done:
+            return None
+        minute = None
+        if self._minute_due_at is not None:
+            minute = max(0.0, self._minute_due_at - time.monotonic())
+        if not self._buffer:
+            return minute
+        if self.tts.queued_seconds() > self.max_queued_audio_sec:
+            timeout = poll_interval  # wait for playback to catch up
+        else:
+            timeout = max(0.0, self._last_commentary_time + self.filler_interval_sec - time.time())
+        return timeout if minute is None else min(timeout, minute)
+
+    def _minute_due_locked(self) -> bool:
+        """Caller holds _lock."""
+        return self._minute_due_at is not None and time.monotonic() >= self._minute_due_at
+
+    def _queue_minute_mark_locked(self) -> None:
+        """The clock reached MINUTE_MARK_S: unless a payload already got there (or the match ended), queue
+        the newest state with the clock at the mark, so the next tick's diff speaks MINUTE_LINE. Caller
+        holds _lock."""
+        self._minute_due_at = None
+        if self._match_ended_done:
+            return
+        latest = self._buffer[-1][1] if self._buffer else self._last_payload or {}
+        if latest.get("match_ended") or (latest.get("t_elapsed_s") or 0) >= MINUTE_MARK_S:
+            return
+        self._buffer_locked({**latest, "t_elapsed_s": MINUTE_MARK_S, "notable_event": True})
+
+    def _drain(self) -> list[tuple[float, dict]]:
+        """Everything buffered that is still fresh (match_ended never goes stale), oldest first."""
+        with self._lock:
+            now = time.monotonic()
+            fresh = [(t, p) for t, p in self._buffer if p.get("match_ended") or now - t <= self.stale_after_sec]
+            self.dropped_stale += len(self._buffer) - len(fresh)
+            self._buffer.clear()
+            return fresh
+
+    def _llm_sentences(self, payloads: list[dict], started_at: float, fallback: list[str]):
+        """Gemini's sentences as they stream in. The stream is read on a helper thread so the first sentence
+        can be given llm_budget_sec; if it is late (or Gemini fails) the fallback lines are yielded instead.
+        Each later sentence gets the same budget; if the stream stalls, the reply ends where it is."""
+        sentences: queue.Queue = queue.Queue()
+        abandoned = threading.Event()
+
+        def produce():
+            try:
+                for sentence in self.commentary_ai.stream_commentary(payloads):
+                    if abandoned.is_set():
+                        return
+                    sentences.put(sentence)
+            finally:
+                sentences.put(None)
+
+        self.llm_calls += 1
+        threading.Thread(target=produce, name="commentary-llm", daemon=True).start()
+        try:
+            first = sentences.get(timeout=self.llm_budget_sec)
+        except queue.Empty:
+            first = None
+        if first is None:
+            abandoned.set()
+            self.llm_fallbacks += 1
+            print(f"[Commentary] No Gemini sentence within {self.llm_budget_sec}s; using template")
+            yield from fallback
+            return
+        self.last_first_sentence_s = round(time.monotonic() - started_at, 3)
+        yield first
+        while True:
+            try:
+                sentence = sentences.get(timeout=self.llm_budget_sec)
+            except queue.Empty:
+                abandoned.set()
+                print(f"[Commentary] Gemini stream stalled for {self.llm_budget_sec}s; ending the reply")
+                return
+            if sentence is None:
+                return
+            yield sentence
+
+    def _harvest_metrics(self) -> None:
+        """Record time to first audio for utterances that have started playing."""
         with self._lock:
-            n = min(len(self._buffer), self.max_payloads_per_call)
-            return [self._buffer.popleft() for _ in range(n)]
+            ready = [item for item in self._awaiting_audio if item[0].first_audio.is_set()]
+            self._awaiting_audio = [
+                (u, t, source) for u, t, source in self._awaiting_audio
+                if not u.first_audio.is_set() and not u.cancelled and u.start_offset is not None
+            ]
+        for u, pushed_at, source in ready:
+            self._record_audio(u, pushed_at, source)
+
+    def _record_audio(self, u: Utterance, pushed_at: float, source: str) -> None:
+        ttfa = u.time_to_first_audio()
+        if ttfa is None:
+            return
+        self.utterances += 1
+        self.last_ttfa_s = round(ttfa, 3)
+        self.avg_ttfa_s = round(ttfa if self.avg_ttfa_s is None else 0.8 * self.avg_ttfa_s + 0.2 * ttfa, 3)
+        self.last_event_to_audio_s = round(u.first_audio_at - pushed_at, 3)
+        print(f"[Commentary] First audio {self.last_ttfa_s:.2f}s after generation start ({source})")
 
     def tick(self) -> bool:
         """Process one batch if conditions met. Returns True if commentary was generated."""
@@ -72,27 +249,101 @@ class CommentaryRunner:
             return False
         with self._lock:
             self._in_flight = True
-        payloads = self._drain()
-        if not payloads:
+        try:
+            return self._speak_batch()
+        finally:
             with self._lock:
-                self._in_flight = False
+                self._in_flight = False  # even if Gemini or TTS raised, or the next batch never runs
+
+    def _speak_batch(self) -> bool:
+        """tick() body, run with _in_flight set."""
+        drained = self._drain()
+        if not drained:
             return False
+        payloads = [p for _, p in drained]
         any_match_ended = any(p.get("match_ended") for p in payloads)
-        text = self.commentary_ai.generate_commentary(payloads)
+        started_at = time.monotonic()
+        with self._lock:
+            prev, self._last_payload = self._last_payload, payloads[-1]
+        lines = diff_lines(prev, payloads[-1])
+        fallbacks = self.llm_fallbacks
+        use_template = bool(lines) and not any_match_ended
+        if any_match_ended and self._filler_queued and self.tts.is_playing():
+            self.tts.stop()  # the wrap-up does not wait for filler
+        self._filler_queued = not use_template and not any_match_ended
+        if use_template:
+            self.template_utterances += 1
+            sentences = iter(lines)
+        else:
+            sentences = self._llm_sentences(payloads, started_at, lines or [score_line(payloads[-1])])
+        # Queued behind any commentary still playing; returns once the last sentence is synthesised,
+        # without waiting for playback
+        u = self.tts.speak_stream(sentences, started_at=started_at)
+        if use_template:
+            source = "template"
+        elif self.llm_fallbacks > fallbacks:
+            source = "template, Gemini too slow"
+        else:
+            source = f"Gemini, first sentence {self.last_first_sentence_s}s"
         self._last_commentary_time = time.time()
-        if text:
-            while self.tts.is_playing():
-                time.sleep(0.1)
-            self.tts.speak(text)
+        if u.start_offset is not None:
+            with self._lock:
+                self._awaiting_audio.append((u, drained[-1][0], source))
         if any_match_ended:
             with self._lock:
                 self._match_ended_done = True
-        with self._lock:
-            self._in_flight = False
         return True
 
+    def stats(self) -> dict:
+        self._harvest_metrics()
+        with self._lock:
+            buffered = len(self._buffer)
+            oldest = self._buffer[0][0] if self._buffer else None
+        return {
+            "buffered": buffered,
+            "in_flight": self._in_flight,
+            "match_ended_done": self._match_ended_done,
+            "utterances": self.utterances,
+            "last_time_to_first_audio_s": self.last_ttfa_s,
+            "avg_time_to_first_audio_s": self.avg_ttfa_s,
+            "last_event_to_audio_s": self.last_event_to_audio_s,
+            "last_first_sentence_s": self.last_first_sentence_s,
+            "template_utterances": self.template_utterances,
+            "llm_calls": self.llm_calls,
+            "llm_fallbacks": self.llm_fallbacks,
+            "oldest_age_s": round(time.monotonic() - oldest, 2) if oldest is not None else None,
+            "superseded": self.superseded,
+            "dropped_stale": self.dropped_stale,
+            "stale_after_sec": self.stale_after_sec,
+            "playing": self.tts.is_playing(),
+            "queued_audio_s": round(self.tts.queued_seconds(), 2),
+            "tts_cache": self.tts.cache.stats() if self.tts.cache is not None else None,
+        }
+
     def run_loop(self, poll_interval: float = 0.5) -> None:
-        """Run tick in a loop until stop."""
-        while not self._stop.is_set():
-            self.tick()
-            self._stop.wait(poll_interval)
+        """Worker: sleep until push() / play_intro() / stop(), the filler interval or the minute mark, then speak.
+        poll_interval only bounds the sleep while waiting for queued audio to play out. Errors are logged
+        and the worker carries on with the next payload."""
+        while True:
+            with self._wake:
+                self._wake.wait_for(
+                    lambda: self._stop.is_set() or self._intro_pending or self._minute_due_locked()
+                    or self._due_locked(),
+                    self._wait_timeout_locked(poll_interval),
+                )
+                if self._stop.is_set():
+                    return
+                intro, self._intro_pending = self._intro_pending, False
+                if self._minute_due_locked():
+                    self._queue_minute_mark_locked()
+            # One failed line (ElevenLabs, Gemini or the network) must not end commentary for the match
+            try:
+                if intro:
+                    self.tts.speak(INTRO_LINE)
+            except Exception as e:
+                print(f"[Commentary] Intro failed: {e}")
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[Commentary] Commentary failed: {e}")
+            self._harvest_metrics()
@@ -0,0 +1,59 @@
+"""Template commentary: fixed lines for the common events, picked by diffing consecutive payloads. The lines are
+pre-rendered into the TTS cache at startup, so speaking one costs no network round trip."""
+
+# Same neutral intro every time (like real sports commentators).
+INTRO_LINE = "And we're off!"
+
+DROP_PHRASES = {
+    "fully_in": "fully in",
+    "edge_touching": "just on the edge",
+    "partially_touching": "just on the edge",
+    "less_than_half_out": "less than half out",
+    "mostly_out": "mostly out",
+}
+ORDINALS = {1: "First", 2: "Second"}
+MINUTE_LINE = "That's one minute gone."
+MINUTE_MARK_S = 60  # match clock seconds at which MINUTE_LINE is due
+WRAP_UP_LINE = "That's the run!"
+
+
+def touch_line(touches: int) -> str:
+    if touches == 1:
+        return "That's the first touch."
+    return f"That's {touches} touches."
+
+
+def drop_line(which: int, rating: str) -> str:
+    """which: 1 or 2 (box_drop_1 / box_drop_2); rating: a BOX_DROP_POINTS key."""
+    return f"{ORDINALS.get(which, 'Next')} drop {DROP_PHRASES.get(rating, rating.replace('_', ' '))}!"
+
+
+def score_line(payload: dict) -> str:
+    return f"{payload.get('score_total', 0)} points at {int(payload.get('t_elapsed_s') or 0)} seconds."
+
+
+def diff_lines(prev: dict | None, cur: dict) -> list[str]:
+    """Lines for what changed from prev to cur (prev None = start of the match): more obstacle touches, a box
+    drop rated or re-rated, the clock passing 60 s, and the match ending."""
+    prev = prev or {}
+    lines = []
+    touches = cur.get("obstacle_touches") or 0
+    if touches > (prev.get("obstacle_touches") or 0):
+        lines.append(touch_line(touches))
+    for which in ORDINALS:
+        rating = cur.get(f"box_drop_{which}")
+        if rating and rating != prev.get(f"box_drop_{which}"):
+            lines.append(drop_line(which, rating))
+    if (prev.get("t_elapsed_s") or 0) < MINUTE_MARK_S <= (cur.get("t_elapsed_s") or 0) and not cur.get("match_ended"):
+        lines.append(MINUTE_LINE)
+    if cur.get("match_ended") and not prev.get("match_ended"):
+        lines += [WRAP_UP_LINE, score_line(cur)]
+    return lines
+
+
+def warmup_lines(max_touches: int = 6) -> list[str]:
+    """Every fixed line worth having in the TTS cache before the first match."""
+    lines = [INTRO_LINE, MINUTE_LINE, WRAP_UP_LINE]
+    lines += [touch_line(n) for n in range(1, max_touches + 1)]
+    lines += [drop_line(which, rating) for which in ORDINALS for rating in DROP_PHRASES]
+    return list(dict.fromkeys(lines))  # aliases render the same line
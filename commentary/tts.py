@@ -1,13 +1,147 @@
-"""ElevenLabs TTS (mirrors Hackhive Project 2026 src/audio/speaker.py)."""
+"""ElevenLabs TTS (mirrors Hackhive Project 2026 src/audio/speaker.py), played through a streaming PCM output."""
 from elevenlabs.client import ElevenLabs
 import numpy as np
 import sounddevice as sd
 import threading
 import time
 
+from .tts_cache import PcmCache
+
+
+class Utterance:
+    """One spoken piece of commentary. first_audio is set when its first sample reaches the output, so
+    time_to_first_audio() covers LLM + synthesis + any audio still queued ahead of it."""
+
+    def __init__(self, started_at=None):
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.start_offset = None  # player byte offset of this utterance's first sample
+        self.first_audio_at = None
+        self.first_audio = threading.Event()
+        self.finished = False
+        self.cancelled = False
+
+    def time_to_first_audio(self):
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+
+class PcmStreamPlayer:
+    """
+    16-bit mono PCM played as it arrives: feed() appends bytes, and a sounddevice.OutputStream callback
+    drains them block by block (silence on underrun). Utterances queue back to back, so the next one can
+    be synthesised while the current one is still playing. The stream is opened on first use and kept
+    open, so starting an utterance costs no device setup.
+    """
+
+    def __init__(self, samplerate=16000, block_ms=20):
+        self.samplerate = samplerate
+        self.blocksize = max(1, samplerate * block_ms // 1000)
+        self._lock = threading.Lock()
+        self._buf = bytearray()
+        self._fed = 0     # bytes ever fed
+        self._played = 0  # bytes ever handed to the device
+        self._waiting = []  # utterances whose first sample has not been played yet
+        self._open = []     # utterances still being fed
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stream = None
+
+    def _ensure_stream(self):
+        if self._stream is None:
+            self._stream = sd.OutputStream(
+                samplerate=self.samplerate,
+                channels=1,
+                dtype="int16",
+                blocksize=self.blocksize,
+                latency="low",
+                callback=self._callback,
+            )
+            self._stream.start()
+
+    def _callback(self, outdata, frames, time_info, status):
+        need = frames * 2
+        with self._lock:
+            n = min(len(self._buf), need) & ~1
+            chunk = bytes(self._buf[:n])
+            del self._buf[:n]
+            self._played += n
+            if self._waiting:
+                now = time.monotonic()
+                still = []
+                for u in self._waiting:
+                    if u.start_offset is not None and self._played > u.start_offset:
+                        u.first_audio_at = now
+                        u.first_audio.set()
+                    elif not u.cancelled:
+                        still.append(u)
+                self._waiting = still
+            if not self._buf and not self._open:
+                self._idle.set()
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        outdata[:len(samples), 0] = samples
+        outdata[len(samples):, 0] = 0
+
+    def begin(self, started_at=None):
+        """Start an utterance; feed() its PCM, then end() it."""
+        u = Utterance(started_at)
+        with self._lock:
+            self._waiting.append(u)
+            self._open.append(u)
+            self._idle.clear()
+        self._ensure_stream()
+        return u
+
+    def feed(self, u, pcm):
+        with self._lock:
+            if u.cancelled or not pcm:
+                return
+            if u.start_offset is None:
+                u.start_offset = self._fed
+            self._buf += pcm
+            self._fed += len(pcm)
+
+    def end(self, u):
+        with self._lock:
+            u.finished = True
+            if u in self._open:
+                self._open.remove(u)
+            if u.start_offset is None and u in self._waiting:
+                self._waiting.remove(u)  # nothing was fed
+            if not self._buf and not self._open:
+                self._idle.set()
+
+    def stop(self):
+        """Drop all queued audio and cancel utterances still being fed."""
+        with self._lock:
+            for u in self._open + self._waiting:
+                u.cancelled = True
+            self._open, self._waiting = [], []
+            self._played += len(self._buf)
+            self._buf.clear()
+            self._idle.set()
+
+    def is_playing(self):
+        return not self._idle.is_set()
+
+    def queued_seconds(self):
+        """Audio fed but not yet played."""
+        return len(self._buf) / 2 / self.samplerate
+
+    def wait(self, timeout=None):
+        """Block until everything queued has played. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def close(self):
+        self.stop()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
 
 class TTSSpeaker:
-    """Text-to-speech using ElevenLabs API."""
+    """Text-to-speech using ElevenLabs API. With a PcmCache, lines already rendered for this voice and model
+    are played straight from disk, and new ones are stored once fully synthesised."""
 
     VOICES = {
         "Guy": "34lPwSZ54D8fWbX1aHzk",
@@ -24,56 +158,89 @@ class TTSSpeaker:
     }
     SAMPLE_RATE = 16000
 
-    def __init__(self, api_key: str, voice: str = "Guy", model: str = "fast"):
+    def __init__(self, api_key: str, voice: str = "Guy", model: str = "fast", cache: PcmCache | None = None):
         self.client = ElevenLabs(api_key=api_key)
         self.voice_id = self.VOICES.get(voice, voice)
         self.model_id = self.MODELS.get(model, model)
-        self._playback_thread = None
-        self._is_playing = False
-        self._stop_playback = threading.Event()
+        self.player = PcmStreamPlayer(self.SAMPLE_RATE)
+        self.cache = cache
 
-    def speak(self, text: str) -> None:
+    def speak(self, text: str) -> Utterance:
+        """Interrupt whatever is playing and say text. Returns once synthesis is done (playback continues)."""
         self.stop()
-        pcm_data = self._generate_pcm(text)
-        audio_array = np.frombuffer(pcm_data, dtype=np.int16)
-        self._stop_playback.clear()
-        self._is_playing = True
-        sd.play(audio_array, samplerate=self.SAMPLE_RATE)
+        return self.speak_stream([text])
 
-        def _monitor():
-            try:
-                while True:
-                    stream = sd.get_stream()
-                    if stream is None or not stream.active:
-                        break
-                    if self._stop_playback.is_set():
-                        sd.stop()
+    def speak_stream(self, sentences, started_at=None) -> Utterance:
+        """Synthesise each sentence as it arrives (e.g. from CommentaryAI.stream_commentary) and play the PCM
+        chunks as ElevenLabs returns them, queued after any audio already playing. Blocks until the last
+        sentence is synthesised; use the returned Utterance for time-to-first-audio."""
+        u = self.player.begin(started_at)
+        try:
+            for sentence in sentences:
+                if u.cancelled:
+                    break
+                cached = self._cached(sentence)
+                if cached is not None:
+                    self.player.feed(u, cached)
+                    continue
+                pcm = bytearray()
+                for chunk in self._pcm_chunks(sentence):
+                    if u.cancelled:
                         break
-                    time.sleep(0.1)
-            except Exception:
-                pass
-            finally:
-                self._is_playing = False
+                    self.player.feed(u, chunk)
+                    pcm += chunk
+                else:
+                    self._store(sentence, pcm)
+        finally:
+            self.player.end(u)
+        return u
 
-        self._playback_thread = threading.Thread(target=_monitor, daemon=True)
-        self._playback_thread.start()
+    def _cached(self, text: str):
+        if self.cache is None:
+            return None
+        return self.cache.get(text, self.voice_id, self.model_id)
 
-    def _generate_pcm(self, text: str) -> bytes:
-        audio = self.client.text_to_speech.convert(
+    def _store(self, text: str, pcm) -> None:
+        if self.cache is not None:
+            self.cache.put(text, self.voice_id, self.model_id, bytes(pcm))
+
+    def warm(self, lines) -> int:
+        """Render lines missing from the cache (e.g. templates.warmup_lines()). Returns how many were
+        synthesised; stops at the first failure (the rest are rendered when first spoken)."""
+        if self.cache is None:
+            return 0
+        rendered = 0
+        for line in lines:
+            if self.cache.contains(line, self.voice_id, self.model_id):
+                continue
+            try:
+                self._store(line, self._generate_pcm(line))
+            except Exception as e:
+                print(f"[TTS] Warm-up stopped: {e}")
+                break
+            rendered += 1
+        return rendered
+
+    def _pcm_chunks(self, text: str):
+        """PCM chunks from the ElevenLabs streaming endpoint, as they arrive."""
+        return self.client.text_to_speech.stream(
             text=text,
             voice_id=self.voice_id,
             model_id=self.model_id,
-            output_format="pcm_16000",
+            output_format=f"pcm_{self.SAMPLE_RATE}",
         )
-        return b"".join(audio)
+
+    def _generate_pcm(self, text: str) -> bytes:
+        return b"".join(self._pcm_chunks(text))
 
     def stop(self) -> None:
-        if self._is_playing:
-            self._stop_playback.set()
-            sd.stop()
-            self._is_playing = False
-            if self._playback_thread and self._playback_thread.is_alive():
-                self._playback_thread.join(timeout=0.5)
+        self.player.stop()
 
     def is_playing(self) -> bool:
-        return self._is_playing
+        return self.player.is_playing()
+
+    def wait(self, timeout=None) -> bool:
+        return self.player.wait(timeout)
+
+    def queued_seconds(self) -> float:
+        return self.player.queued_seconds()
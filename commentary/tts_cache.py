@@ -0,0 +1,110 @@
+"""On-disk cache of synthesised PCM, keyed by what was said and how (text, voice, model)."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+def cache_key(text: str, voice_id: str, model_id: str) -> str:
+    return hashlib.sha256(f"{text.strip()}|{voice_id}|{model_id}".encode()).hexdigest()
+
+
+class PcmCache:
+    """
+    One <sha256>.pcm file per line in directory. Least recently used files are deleted once the total
+    exceeds max_bytes; file mtimes record use, so the LRU order survives restarts. Thread-safe: every
+    arena's TTSSpeaker can share one cache.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes: OrderedDict[str, int] = OrderedDict()  # key -> bytes, least recently used first
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pcm"
+
+    def _load(self) -> None:
+        if not self.directory.is_dir():
+            return
+        files = sorted(self.directory.glob("*.pcm"), key=lambda p: p.stat().st_mtime)
+        for p in files:
+            size = p.stat().st_size
+            self._sizes[p.stem] = size
+            self._total += size
+        self._delete(self._evict_locked())  # the cap may have been lowered since the last run
+
+    def _evict_locked(self, keep: int = 0) -> list[str]:
+        """Drop least recently used entries until under max_bytes (keeping at least keep). Caller holds _lock
+        (or is __init__); returns the keys whose files should be deleted."""
+        evict = []
+        while self._total > self.max_bytes and len(self._sizes) > keep:
+            old, size = self._sizes.popitem(last=False)
+            self._total -= size
+            evict.append(old)
+        return evict
+
+    def _delete(self, keys: list[str]) -> None:
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def get(self, text: str, voice_id: str, model_id: str) -> bytes | None:
+        key = cache_key(text, voice_id, model_id)
+        with self._lock:
+            if key not in self._sizes:
+                self.misses += 1
+                return None
+            self._sizes.move_to_end(key)
+        try:
+            pcm = self._path(key).read_bytes()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._total -= self._sizes.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return pcm
+
+    def contains(self, text: str, voice_id: str, model_id: str) -> bool:
+        with self._lock:
+            return cache_key(text, voice_id, model_id) in self._sizes
+
+    def put(self, text: str, voice_id: str, model_id: str, pcm: bytes) -> None:
+        if not pcm or len(pcm) > self.max_bytes:
+            return
+        key = cache_key(text, voice_id, model_id)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(pcm)
+            os.replace(tmp, path)  # readers never see a partial file
+        except OSError as e:
+            print(f"[TTS] Cache write failed: {e}")
+            return
+        with self._lock:
+            self._total += len(pcm) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(pcm)
+            evict = self._evict_locked(keep=1)
+        self._delete(evict)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._sizes),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -8,6 +8,16 @@ _root = Path(__file__).resolve().parent.parent
 load_dotenv(_root / ".env")
 
 
+def _parse_arenas(value: str, default_source: int | str) -> dict[str, int | str]:
+    """'A=0,B=rtsp://...' -> {'A': 0, 'B': 'rtsp://...'}; empty -> {'main': default_source}."""
+    arenas: dict[str, int | str] = {}
+    for entry in filter(None, (e.strip() for e in value.split(","))):
+        arena_id, _, source = entry.partition("=")
+        source = source.strip()
+        arenas[arena_id.strip()] = int(source) if source.lstrip("-").isdigit() else (source or default_source)
+    return arenas or {"main": default_source}
+
+
 class Settings:
     """Application settings for UTRA commentary and web pipeline."""
 
@@ -33,18 +43,66 @@ class Settings:
     except ValueError:
         pass  # keep as string for URL
 
-    # Commentary rate limiting
+    # Arenas (tracks) served by one process: "A=0,B=1" maps arena ID -> video source (camera index or URL).
+    # Empty = one arena, "main", on VIDEO_SOURCE. The first arena is the default when ?arena= is omitted.
+    ARENAS = _parse_arenas(os.getenv("ARENAS", ""), VIDEO_SOURCE)
+    DEFAULT_ARENA = next(iter(ARENAS))
+
+    # /stream: frames kept in the shared ring buffer, and seconds to keep the camera open after the last viewer leaves
+    STREAM_RING_SIZE = int(os.getenv("STREAM_RING_SIZE", "4"))
+    STREAM_IDLE_TIMEOUT_SEC = float(os.getenv("STREAM_IDLE_TIMEOUT_SEC", "5.0"))
+    STREAM_CAPTURE_WORKERS = int(os.getenv("STREAM_CAPTURE_WORKERS", "4"))  # max video sources captured at once
+    # Default encode tier for /stream (viewers can override with ?width=&quality=&fps=); 95 is OpenCV's default
+    STREAM_JPEG_QUALITY = int(os.getenv("STREAM_JPEG_QUALITY", "95"))
+    STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "0"))  # 0 = camera rate
+    # Optimized Huffman tables: ~5-10% smaller JPEGs for a little extra CPU (opencv-python ships libjpeg-turbo)
+    STREAM_JPEG_OPTIMIZE = os.getenv("STREAM_JPEG_OPTIMIZE", "false").lower() in ("1", "true", "yes")
+
+    # Headless vision engine (scores from the /stream capture): frames/sec analysed, scene re-detect period,
+    # samples a box-drop rating must hold before it is recorded, and start it with the server
+    VISION_PROCESS_FPS = float(os.getenv("VISION_PROCESS_FPS", "15"))
+    VISION_SCENE_REFRESH_SEC = float(os.getenv("VISION_SCENE_REFRESH_SEC", "2.0"))
+    VISION_DROP_STABLE_FRAMES = int(os.getenv("VISION_DROP_STABLE_FRAMES", "8"))
+    VISION_AUTOSTART = os.getenv("VISION_AUTOSTART", "false").lower() in ("1", "true", "yes")
+
+    # Match event log: matches kept in memory per arena, and optional directory for per-match JSONL files
+    EVENT_LOG_MAX_MATCHES = int(os.getenv("EVENT_LOG_MAX_MATCHES", "50"))
+    EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "")
+
+    # Commentary rate limiting: newest payloads kept per batch (older ones are superseded), and seconds after
+    # which a buffered payload is too old to comment on (match end never expires)
     FILLER_INTERVAL_SEC = float(os.getenv("FILLER_INTERVAL_SEC", "12.0"))
     MAX_PAYLOADS_PER_CALL = int(os.getenv("MAX_PAYLOADS_PER_CALL", "3"))
+    COMMENTARY_STALE_SEC = float(os.getenv("COMMENTARY_STALE_SEC", "5.0"))
+    # Seconds Gemini gets to produce its first sentence before a template line is spoken instead
+    COMMENTARY_LLM_BUDGET_SEC = float(os.getenv("COMMENTARY_LLM_BUDGET_SEC", "2.0"))
 
     # MongoDB Atlas (leaderboard persistence)
     MONGODB_URI = os.getenv("MONGODB_URI", "")
     MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "utra_match")
     MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION", "matches")
+    # Connection pool, and server selection / connect timeout (a failed connect is retried with backoff)
+    MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "20"))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    MONGODB_TIMEOUT_MS = int(os.getenv("MONGODB_TIMEOUT_MS", "5000"))
+    # Saved runs go to the local store first; the syncer uploads them with insert_many in batches
+    MONGODB_WRITE_BATCH = int(os.getenv("MONGODB_WRITE_BATCH", "50"))
+    MONGODB_WRITE_INTERVAL_SEC = float(os.getenv("MONGODB_WRITE_INTERVAL_SEC", "0.5"))
+    # In-process leaderboard cache in front of MongoDB: seconds before a background reload (0 = no cache,
+    # query Atlas per request), and optionally follow a change stream for runs saved by other processes
+    LEADERBOARD_CACHE_TTL_SEC = float(os.getenv("LEADERBOARD_CACHE_TTL_SEC", "30"))
+    LEADERBOARD_CHANGE_STREAM = os.getenv("LEADERBOARD_CHANGE_STREAM", "false").lower() in ("1", "true", "yes")
 
     # Paths
     PROJECT_ROOT = Path(__file__).resolve().parent.parent
     OUTPUT_DIR = PROJECT_ROOT / "output"
+    # Embedded SQLite store every saved run is written to first (the leaderboard is reloaded from it on restart)
+    LOCAL_STORE_PATH = Path(os.getenv("LOCAL_STORE_PATH", "") or OUTPUT_DIR / "runs.sqlite3")
+    # Synthesised commentary audio, reused for repeated lines (LRU, capped at TTS_CACHE_MAX_MB; 0 = off),
+    # and pre-render the intro / touch / box-drop lines at startup
+    TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", "") or OUTPUT_DIR / "tts_cache")
+    TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "64"))
+    TTS_CACHE_WARMUP = os.getenv("TTS_CACHE_WARMUP", "true").lower() in ("1", "true", "yes")
 
     @classmethod
     def validate(cls) -> list[str]:
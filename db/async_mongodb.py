@@ -0,0 +1,49 @@
+"""asyncio front end for db.mongodb: each call runs on a dedicated thread pool sized to the MongoDB connection
+pool, so async handlers await Atlas without blocking the event loop or Starlette's request threadpool."""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from config.settings import Settings
+from db import mongodb
+
+_executor = ThreadPoolExecutor(max_workers=max(1, Settings.MONGODB_MAX_POOL_SIZE), thread_name_prefix="mongodb")
+
+
+async def _run(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def check_connection() -> tuple[bool, str | None]:
+    return await _run(mongodb.check_connection)
+
+
+async def ensure_indexes() -> list[str]:
+    return await _run(mongodb.ensure_indexes)
+
+
+async def insert_many(docs: list[dict[str, Any]]) -> int | None:
+    return await _run(mongodb.insert_many, docs)
+
+
+async def get_leaderboard(limit: int = 100) -> list[dict[str, Any]]:
+    return await _run(mongodb.get_leaderboard, limit)
+
+
+async def get_leaderboard_page(
+    limit: int = 100, after: tuple[float, float, int, str] | None = None
+) -> tuple[list[dict[str, Any]], str | None]:
+    return await _run(mongodb.get_leaderboard_page, limit, after)
+
+
+async def get_team_leaderboard(limit: int = 100) -> list[dict[str, Any]]:
+    return await _run(mongodb.get_team_leaderboard, limit)
+
+
+async def explain_leaderboard(limit: int = 100) -> dict[str, Any] | None:
+    return await _run(mongodb.explain_leaderboard, limit)
+
+
+async def check_paging(page_size: int = 10) -> dict[str, Any] | None:
+    return await _run(mongodb.check_paging, page_size)
@@ -0,0 +1,184 @@
+"""Read-through leaderboard cache in front of MongoDB: reads come from an in-process LeaderboardIndex, and
+the database is only touched on writes and background reloads."""
+import threading
+import time
+from typing import Any, Callable
+
+from db import mongodb as db_mongodb
+from db.local_store import LocalRunStore
+from state.leaderboard import LeaderboardIndex
+
+
+def _row_id(row: dict[str, Any]) -> str:
+    """Key of a run: its MongoDB _id (removed from the row), else its run_id. Runs synced from the local
+    store have _id == run_id, so both spellings name the same run."""
+    if "_id" in row:
+        return str(row.pop("_id"))
+    return row["run_id"]
+
+
+class LeaderboardCache:
+    """
+    Mirror of the MongoDB runs in a LeaderboardIndex, so GET /api/leaderboard never waits on Atlas.
+
+      read:    index() returns the current index; once it is older than ttl_sec a background thread
+               reloads it (single-flight) while readers keep getting the old one
+      write:   add() puts a run saved to the local store straight into the index (write-through), so a
+               save needs no second query; runs the store has not synced yet are merged into every
+               reload, and if MongoDB cannot be read at all the local store is served instead
+      watch:   start_watch() follows a change stream so runs saved by other backends appear immediately
+
+    Runs are loaded in save order, so each run's position (the id in leaderboard cursors) stays the same
+    across reloads.
+    """
+
+    def __init__(self, ttl_sec: float = 30.0, store: LocalRunStore | None = None):
+        self.ttl_sec = ttl_sec
+        self._store = store
+        self._lock = threading.Lock()
+        self._index: LeaderboardIndex | None = None
+        self._ids: set[str] = set()
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._written: list[tuple[str, dict[str, Any]]] | None = None  # writes made during a reload
+        self._watch_stop = threading.Event()
+        self._watching = False
+        self.refreshes = 0
+        self.last_refresh_ms: float | None = None
+        self.last_error: str | None = None
+
+    def index(self) -> LeaderboardIndex:
+        """Current index; never waits on the database. Before the first load (normally refresh() at startup)
+        has finished this starts one in the background and returns an empty index."""
+        idx = self._index
+        if idx is None:
+            self._refresh_async()
+            return LeaderboardIndex()
+        if time.monotonic() - self._loaded_at >= self.ttl_sec:
+            self._refresh_async()
+        return idx
+
+    def invalidate(self) -> None:
+        """Reload in the background; readers keep the current index meanwhile."""
+        self._loaded_at = 0.0
+        self._refresh_async()
+
+    def _refresh_async(self) -> None:
+        if self._refreshing:
+            return
+        threading.Thread(target=self.refresh, name="leaderboard-refresh", daemon=True).start()
+
+    def refresh(self) -> bool:
+        """Reload every run from MongoDB and swap in a new index. Returns False if a reload was already
+        running or the query failed (the old index is kept and retried after another ttl_sec)."""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            self._written = []
+        try:
+            t0 = time.perf_counter()
+            rows = db_mongodb.load_runs()
+            loaded = rows is not None
+            if not loaded:
+                self.last_error = "load_runs failed"
+                with self._lock:
+                    if self._index is not None:
+                        self._loaded_at = time.monotonic()
+                        return False
+                # nothing loaded yet: serve the local store until MongoDB is back
+                rows = self._store.all_runs() if self._store is not None else []
+            idx = LeaderboardIndex()
+            ids: set[str] = set()
+            for row in rows:
+                ids.add(_row_id(row))
+                idx.add(row)
+            for row in self._store.unsynced() if self._store is not None and loaded else []:
+                if row["run_id"] not in ids:
+                    ids.add(row["run_id"])
+                    idx.add(row)
+            with self._lock:
+                for row_id, row in self._written:
+                    if row_id not in ids:
+                        ids.add(row_id)
+                        idx.add(row)
+                self._index, self._ids = idx, ids
+                self._loaded_at = time.monotonic()
+            if not loaded:
+                return False
+            self.refreshes += 1
+            self.last_refresh_ms = round((time.perf_counter() - t0) * 1000, 1)
+            self.last_error = None
+            return True
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._written = None
+
+    def _add(self, row_id: str, row: dict[str, Any]) -> bool:
+        with self._lock:
+            if row_id in self._ids:
+                return False
+            self._ids.add(row_id)
+            if self._written is not None:
+                self._written.append((row_id, row))
+            idx = self._index
+        if idx is not None:
+            idx.add(row)
+        return True
+
+    def add(self, run: dict[str, Any]) -> bool:
+        """Write-through for a run saved to the local store by this process. False if already present."""
+        return self._add(run["run_id"], run)
+
+    def start_watch(self, on_change: Callable[[], None] | None = None) -> None:
+        """Follow the collection's change stream in a daemon thread. Inserts are added to the index;
+        updates and deletes trigger a reload. on_change is called after either."""
+        if self._watching:
+            return
+        self._watching = True
+        self._watch_stop.clear()
+        threading.Thread(target=self._watch, args=(on_change,), name="leaderboard-watch", daemon=True).start()
+
+    def stop_watch(self) -> None:
+        self._watch_stop.set()
+
+    def _watch(self, on_change: Callable[[], None] | None) -> None:
+        backoff = 1.0
+        try:
+            while not self._watch_stop.is_set():
+                try:
+                    with db_mongodb.watch_runs() as stream:
+                        print("[MongoDB] Following leaderboard change stream")
+                        backoff = 1.0
+                        while not self._watch_stop.is_set():
+                            change = stream.try_next()
+                            if change is None:
+                                continue
+                            if change["operationType"] == "insert":
+                                row = dict(change["fullDocument"])
+                                changed = self._add(_row_id(row), row)
+                            else:
+                                self.invalidate()
+                                changed = True
+                            if changed and on_change is not None:
+                                on_change()
+                except Exception as e:
+                    self.last_error = f"change stream: {e}"
+                    print(f"[MongoDB] Change stream error: {e}; retrying in {backoff:.0f}s")
+                    self._watch_stop.wait(backoff)
+                    backoff = min(backoff * 2, 60.0)
+        finally:
+            self._watching = False
+
+    def stats(self) -> dict[str, Any]:
+        idx = self._index
+        return {
+            "runs": len(idx) if idx is not None else None,
+            "age_s": round(time.monotonic() - self._loaded_at, 1) if idx is not None else None,
+            "ttl_sec": self.ttl_sec,
+            "refreshes": self.refreshes,
+            "last_refresh_ms": self.last_refresh_ms,
+            "change_stream": self._watching,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,111 @@
+"""Embedded run store (SQLite, WAL mode): every saved run is written here first, so runs survive restarts and
+Atlas outages. db.sync uploads the unsynced ones to MongoDB."""
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    synced_at TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_unsynced ON runs (seq) WHERE synced_at IS NULL;
+"""
+
+
+def new_run_id(idempotency_key: str | None = None) -> str:
+    """24-hex run ID, usable as a MongoDB ObjectId. With an idempotency key (e.g. a client's retried
+    request) the ID is derived from it, so the same key always names the same run."""
+    if idempotency_key:
+        return hashlib.sha256(idempotency_key.encode()).hexdigest()[:24]
+    from bson import ObjectId
+    return str(ObjectId())
+
+
+class LocalRunStore:
+    """
+    runs(seq, run_id, created_at, doc JSON, synced_at). run_id is unique, so inserting a run twice is a
+    no-op that returns the stored run. Rows are kept after syncing (the local copy is the restart source
+    when MongoDB is not configured); synced_at just marks what the uploader has done.
+    The connection is opened on first use and shared by all threads behind a lock.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        """Caller holds _lock."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=FULL")  # a saved run is on disk when insert() returns
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _row_doc(run_id: str, created_at: str, doc: str) -> dict[str, Any]:
+        return {**json.loads(doc), "run_id": run_id, "created_at": datetime.fromisoformat(created_at)}
+
+    def insert(self, doc: dict[str, Any], run_id: str | None = None) -> tuple[dict[str, Any], bool]:
+        """Store one run. Returns (stored run with run_id and created_at, created). created is False when
+        run_id was already stored; the original run is returned unchanged."""
+        run_id = run_id or new_run_id()
+        created_at = datetime.utcnow()
+        body = json.dumps({k: v for k, v in doc.items() if k not in ("run_id", "created_at", "_id")},
+                          separators=(",", ":"), default=str)
+        with self._lock:
+            db = self._conn()
+            cur = db.execute(
+                "INSERT OR IGNORE INTO runs (run_id, created_at, doc) VALUES (?, ?, ?)",
+                (run_id, created_at.isoformat(), body),
+            )
+            if cur.rowcount:
+                return {**json.loads(body), "run_id": run_id, "created_at": created_at}, True
+            row = db.execute("SELECT run_id, created_at, doc FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return self._row_doc(*row), False
+
+    def all_runs(self) -> list[dict[str, Any]]:
+        """Every run in save order."""
+        with self._lock:
+            rows = self._conn().execute("SELECT run_id, created_at, doc FROM runs ORDER BY seq").fetchall()
+        return [self._row_doc(*row) for row in rows]
+
+    def unsynced(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Runs not yet uploaded, oldest first."""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT run_id, created_at, doc FROM runs WHERE synced_at IS NULL ORDER BY seq LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+        return [self._row_doc(*row) for row in rows]
+
+    def mark_synced(self, run_ids: list[str]) -> None:
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn().executemany(
+                "UPDATE runs SET synced_at = ? WHERE run_id = ?", [(now, run_id) for run_id in run_ids]
+            )
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            total, unsynced = self._conn().execute(
+                "SELECT COUNT(*), COUNT(*) - COUNT(synced_at) FROM runs"
+            ).fetchone()
+        return {"runs": total, "unsynced": unsynced}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
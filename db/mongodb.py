@@ -1,30 +1,76 @@
-"""MongoDB Atlas: insert_match, get_leaderboard, and connection check. No-op when MONGODB_URI is empty."""
+"""MongoDB Atlas: insert_match / insert_many, get_leaderboard (cursor-paged), get_team_leaderboard, indexes, and
+connection check. Blocking pymongo calls; db.async_mongodb runs them off the event loop. No-op when MONGODB_URI is empty."""
+import threading
+import time
 from datetime import datetime
 from typing import Any
 
+from state.leaderboard import format_cursor
+
 _client = None
+_client_lock = threading.Lock()
 _connection_error: str | None = None
+_retry_at = 0.0       # monotonic time before which _get_client does not try to connect again
+_retry_backoff = 1.0  # doubles per failed attempt, up to RECONNECT_MAX_SEC
+RECONNECT_MAX_SEC = 60.0
+_indexes_ready = False
+
+# Leaderboard order: score desc, then faster time, then fewer obstacle touches; _id makes it total for cursors
+LEADERBOARD_SORT = [("score_total", -1), ("t_elapsed_s", 1), ("obstacle_touches", 1), ("_id", 1)]
+
+# name -> keys. leaderboard serves get_leaderboard's sort + cursor range without an in-memory SORT;
+# team_best serves get_team_leaderboard's per-team $sort and any team_number lookup (it is the prefix);
+# created_at serves newest-first / since-time scans; run_id is the idempotency key of runs saved via the
+# local store (unique, so a run can never be stored twice even under a different _id).
+INDEXES: dict[str, list[tuple[str, int]]] = {
+    "leaderboard": LEADERBOARD_SORT,
+    "team_best": [("team_number", 1)] + LEADERBOARD_SORT[:3],
+    "created_at": [("created_at", -1)],
+    "run_id": [("run_id", 1)],
+}
+_INDEX_OPTIONS: dict[str, dict[str, Any]] = {
+    "run_id": {"unique": True, "partialFilterExpression": {"run_id": {"$type": "string"}}},
+}
+_RUN_FIELDS = ("created_at", "team_number", "team_display", "score_total", "t_elapsed_s", "obstacle_touches",
+               "completed_under_60", "box_drop_1", "box_drop_2", "score_breakdown", "arena", "match_id", "run_id")
 
 
 def _get_client():
-    global _client, _connection_error
+    """Shared MongoClient (its own pool handles reconnects once connected). A failed first connect is
+    retried with exponential backoff instead of disabling MongoDB for the rest of the process."""
+    global _client, _connection_error, _retry_at, _retry_backoff
     if _client is not None:
         return _client
-    if _connection_error is not None:
-        return None
     from config.settings import Settings
     if not Settings.MONGODB_URI:
         return None
-    try:
-        from pymongo import MongoClient
-        _client = MongoClient(Settings.MONGODB_URI, serverSelectionTimeoutMS=5000)
-        _client.admin.command("ping")
-        _connection_error = None
-        return _client
-    except Exception as e:
-        _connection_error = str(e)
-        print(f"[MongoDB] Connection failed: {_connection_error}")
-        return None
+    with _client_lock:
+        if _client is not None:
+            return _client
+        now = time.monotonic()
+        if now < _retry_at:
+            return None
+        client = None
+        try:
+            from pymongo import MongoClient
+            client = MongoClient(
+                Settings.MONGODB_URI,
+                maxPoolSize=Settings.MONGODB_MAX_POOL_SIZE,
+                minPoolSize=Settings.MONGODB_MIN_POOL_SIZE,
+                serverSelectionTimeoutMS=Settings.MONGODB_TIMEOUT_MS,
+                connectTimeoutMS=Settings.MONGODB_TIMEOUT_MS,
+            )
+            client.admin.command("ping")
+            _client, _connection_error, _retry_backoff = client, None, 1.0
+            return _client
+        except Exception as e:
+            _connection_error = str(e)
+            _retry_at = time.monotonic() + _retry_backoff
+            print(f"[MongoDB] Connection failed: {_connection_error}; retrying in {_retry_backoff:.0f}s")
+            _retry_backoff = min(_retry_backoff * 2, RECONNECT_MAX_SEC)
+            if client is not None:
+                client.close()
+            return None
 
 
 def check_connection() -> tuple[bool, str | None]:
@@ -34,7 +80,8 @@ def check_connection() -> tuple[bool, str | None]:
         from config.settings import Settings
         if not Settings.MONGODB_URI:
             return False, "MONGODB_URI not set"
-        return False, _connection_error or "Connection failed"
+        retry_in = max(0.0, _retry_at - time.monotonic())
+        return False, f"{_connection_error or 'Connection failed'} (next retry in {retry_in:.0f}s)"
     try:
         client.admin.command("ping")
         return True, None
@@ -61,22 +108,201 @@ def insert_match(doc: dict[str, Any]) -> dict[str, Any] | None:
         return None
 
 
-def get_leaderboard(limit: int = 100) -> list[dict[str, Any]]:
-    """Return matches sorted by score_total desc. Same shape as in-memory leaderboard for frontend."""
+def insert_many(docs: list[dict[str, Any]]) -> int | None:
+    """Insert documents that already carry _id (unordered). Duplicate _ids count as written, so retrying a
+    batch after a timeout is idempotent. Returns how many are stored, or None if MongoDB is unavailable
+    or the write failed (retry later)."""
+    coll = _collection()
+    if coll is None:
+        return None
+    from pymongo.errors import BulkWriteError
+    try:
+        coll.insert_many(docs, ordered=False)
+        return len(docs)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if all(err.get("code") == 11000 for err in errors):
+            return len(docs)
+        print(f"[MongoDB] insert_many failed: {errors[:1]}")
+        return None
+    except Exception as e:
+        print(f"[MongoDB] insert_many failed: {e}")
+        return None
+
+
+def _collection():
     client = _get_client()
     if client is None:
-        return []
+        return None
     from config.settings import Settings
-    db = client[Settings.MONGODB_DB_NAME]
-    coll = db[Settings.MONGODB_COLLECTION]
+    return client[Settings.MONGODB_DB_NAME][Settings.MONGODB_COLLECTION]
+
+
+def ensure_indexes() -> list[str]:
+    """Create the INDEXES (idempotent; existing ones are left alone). Call at startup. Returns the
+    index names now present, or [] if MongoDB is unavailable."""
+    global _indexes_ready
+    coll = _collection()
+    if coll is None:
+        return []
+    for name, keys in INDEXES.items():
+        try:
+            coll.create_index(keys, name=name, **_INDEX_OPTIONS.get(name, {}))
+        except Exception as e:
+            print(f"[MongoDB] create_index {name} failed: {e}")
     try:
-        cursor = coll.find(
-            {},
-            {"_id": 0, "created_at": 1, "team_number": 1, "team_display": 1, "score_total": 1,
-             "t_elapsed_s": 1, "obstacle_touches": 1, "completed_under_60": 1, "box_drop_1": 1, "box_drop_2": 1,
-             "score_breakdown": 1},
-        ).sort("score_total", -1).limit(limit)
-        return list(cursor)
+        names = sorted(coll.index_information())
+    except Exception as e:
+        print(f"[MongoDB] index_information failed: {e}")
+        return []
+    _indexes_ready = all(name in names for name in INDEXES)
+    return names
+
+
+def _after_filter(after: tuple[float, float, int, str]) -> dict[str, Any]:
+    """Rows strictly after the cursor in LEADERBOARD_SORT order (a range on the leaderboard index)."""
+    from bson import ObjectId
+    score, t, touches, row_id = after
+    if not ObjectId.is_valid(row_id):
+        raise ValueError(f"invalid id {row_id!r}")
+    return {"$or": [
+        {"score_total": {"$lt": score}},
+        {"score_total": score, "t_elapsed_s": {"$gt": t}},
+        {"score_total": score, "t_elapsed_s": t, "obstacle_touches": {"$gt": touches}},
+        {"score_total": score, "t_elapsed_s": t, "obstacle_touches": touches, "_id": {"$gt": ObjectId(row_id)}},
+    ]}
+
+
+def _leaderboard_cursor(coll, limit: int, query: dict[str, Any]):
+    return coll.find(query, {f: 1 for f in _RUN_FIELDS}).sort(LEADERBOARD_SORT).limit(limit)
+
+
+def get_leaderboard_page(
+    limit: int = 100, after: tuple[float, float, int, str] | None = None
+) -> tuple[list[dict[str, Any]], str | None]:
+    """One page in leaderboard order, starting after the cursor (see parse_cursor). Returns (rows,
+    next_cursor); next_cursor is None on the last page. Seeks on the leaderboard index, so deep pages
+    cost the same as the first. Raises ValueError for a cursor whose id is not an ObjectId."""
+    query = _after_filter(after) if after else {}
+    coll = _collection()
+    if coll is None:
+        return [], None
+    try:
+        rows = list(_leaderboard_cursor(coll, limit + 1, query))
     except Exception as e:
         print(f"[MongoDB] get_leaderboard failed: {e}")
-        return []
\ No newline at end of file
+        return [], None
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = format_cursor(last.get("score_total", 0), last.get("t_elapsed_s", 0),
+                                    last.get("obstacle_touches", 0), last["_id"])
+    for row in rows:
+        row.pop("_id", None)
+    return rows, next_cursor
+
+
+def get_leaderboard(limit: int = 100) -> list[dict[str, Any]]:
+    """Return the top matches sorted by score_total desc, then t_elapsed_s, then obstacle_touches.
+    Same shape as in-memory leaderboard for frontend."""
+    return get_leaderboard_page(limit)[0]
+
+
+def load_runs() -> list[dict[str, Any]] | None:
+    """Every run in save order (created_at, then _id), for building the in-process leaderboard cache.
+    Rows keep _id. None if MongoDB is unavailable or the query failed."""
+    coll = _collection()
+    if coll is None:
+        return None
+    try:
+        return list(coll.find({}, {f: 1 for f in _RUN_FIELDS}).sort([("created_at", 1), ("_id", 1)]))
+    except Exception as e:
+        print(f"[MongoDB] load_runs failed: {e}")
+        return None
+
+
+def watch_runs():
+    """Change stream over the collection (full documents for inserts). Raises if change streams are
+    unsupported (standalone server) or MongoDB is unavailable; iterate it in a background thread."""
+    coll = _collection()
+    if coll is None:
+        raise RuntimeError(_connection_error or "MongoDB not configured")
+    return coll.watch()
+
+
+def _plan_stages(plan: dict[str, Any], out: list[dict[str, Any]]) -> None:
+    if "stage" in plan:
+        out.append({"stage": plan["stage"], **({"index": plan["indexName"]} if "indexName" in plan else {})})
+    for key in ("queryPlan", "inputStage"):
+        if isinstance(plan.get(key), dict):
+            _plan_stages(plan[key], out)
+    for child in plan.get("inputStages", []):
+        _plan_stages(child, out)
+
+
+def explain_leaderboard(limit: int = 100) -> dict[str, Any] | None:
+    """Winning plan of the leaderboard query: stages, index used, and whether it fell back to a
+    collection scan or an in-memory SORT. None if MongoDB is unavailable."""
+    coll = _collection()
+    if coll is None:
+        return None
+    try:
+        explained = _leaderboard_cursor(coll, limit, {}).explain()
+    except Exception as e:
+        return {"error": str(e)}
+    stages: list[dict[str, Any]] = []
+    _plan_stages(explained.get("queryPlanner", {}).get("winningPlan", {}), stages)
+    names = [s["stage"] for s in stages]
+    stats = explained.get("executionStats", {})
+    return {
+        "stages": stages,
+        "index": next((s["index"] for s in stages if "index" in s), None),
+        "collection_scan": "COLLSCAN" in names,
+        "in_memory_sort": "SORT" in names,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+    }
+
+
+def check_paging(page_size: int = 10) -> dict[str, Any] | None:
+    """Fetch pages 1 and 2 through the cursor and compare them with one query for both: they must be
+    contiguous (no run skipped or repeated at the page boundary). None if MongoDB is unavailable."""
+    if _collection() is None:
+        return None
+    from state.leaderboard import parse_cursor
+    try:
+        first, cursor = get_leaderboard_page(page_size)
+        second = get_leaderboard_page(page_size, parse_cursor(cursor))[0] if cursor else []
+        expected = get_leaderboard_page(2 * page_size)[0]
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": first + second == expected, "page_size": page_size, "rows": [len(first), len(second)]}
+
+
+def get_team_leaderboard(limit: int = 100) -> list[dict[str, Any]]:
+    """Best run per team plus attempts and avg_t_elapsed_s, in leaderboard order. Computed by an aggregation
+    pipeline whose first $sort walks the team_best compound index; $group then keeps each team's first run."""
+    coll = _collection()
+    if coll is None:
+        return []
+    if not _indexes_ready:
+        ensure_indexes()
+    pipeline = [
+        {"$sort": dict(INDEXES["team_best"])},
+        {"$group": {
+            "_id": "$team_number",
+            **{f: {"$first": f"${f}"} for f in _RUN_FIELDS},
+            "attempts": {"$sum": 1},
+            "avg_t_elapsed_s": {"$avg": "$t_elapsed_s"},
+        }},
+        {"$sort": dict(LEADERBOARD_SORT[:3])},
+        {"$limit": limit},
+        {"$project": {"_id": 0, **{f: 1 for f in _RUN_FIELDS}, "attempts": 1,
+                      "avg_t_elapsed_s": {"$round": ["$avg_t_elapsed_s", 2]}}},
+    ]
+    try:
+        return list(coll.aggregate(pipeline))
+    except Exception as e:
+        print(f"[MongoDB] get_team_leaderboard failed: {e}")
+        return []
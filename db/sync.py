@@ -0,0 +1,87 @@
+"""Background upload of locally stored runs to MongoDB: the local store is the write path, this keeps Atlas
+caught up whenever it is reachable."""
+import threading
+from typing import Any
+
+from db import mongodb as db_mongodb
+from db.local_store import LocalRunStore
+
+
+class AtlasSyncer:
+    """
+    Writer thread that sends the store's unsynced runs to MongoDB with insert_many, up to batch_size per
+    call, at most every interval_sec unless notify() says a run was just saved. Each document's _id is
+    its run_id, so a batch retried after a timeout (or re-sent after a crash between insert and
+    mark_synced) hits duplicate keys instead of creating copies. While MongoDB is unreachable the
+    retry delay backs off up to db_mongodb.RECONNECT_MAX_SEC; runs wait in the store meanwhile.
+    """
+
+    def __init__(self, store: LocalRunStore, batch_size: int = 50, interval_sec: float = 0.5):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.interval_sec = interval_sec
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._backoff = 0.0
+        self.synced = 0
+        self.batches = 0
+        self.last_error: str | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="atlas-sync", daemon=True)
+        self._thread.start()
+        unsynced = self.store.counts()["unsynced"]
+        if unsynced:
+            print(f"[MongoDB] {unsynced} runs waiting to sync to Atlas")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Make one last upload attempt, then stop. Anything unsent stays in the store."""
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def notify(self) -> None:
+        """A run was saved; upload it without waiting for the next interval (unless backing off)."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        from bson import ObjectId
+        while True:
+            stopping = self._stop.is_set()
+            if not stopping:
+                if self._backoff:
+                    self._stop.wait(self._backoff)
+                else:
+                    self._wake.wait(self.interval_sec)
+                self._wake.clear()
+            batch = self.store.unsynced(self.batch_size)
+            if batch:
+                docs = [{**doc, "_id": ObjectId(doc["run_id"])} for doc in batch]
+                if db_mongodb.insert_many(docs) is None:
+                    self.last_error = "insert_many failed"
+                    self._backoff = min(max(1.0, self._backoff * 2), db_mongodb.RECONNECT_MAX_SEC)
+                else:
+                    self.store.mark_synced([doc["run_id"] for doc in batch])
+                    self.synced += len(batch)
+                    self.batches += 1
+                    self._backoff = 0.0
+                    self.last_error = None
+                    if len(batch) == self.batch_size:
+                        self._wake.set()  # more may be waiting
+            if stopping:
+                return
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.store.counts(),
+            "synced_this_run": self.synced,
+            "batches": self.batches,
+            "retry_backoff_s": self._backoff,
+            "last_error": self.last_error,
+        }
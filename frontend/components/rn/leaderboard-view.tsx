@@ -9,7 +9,7 @@ import {
 } from "react-native";
 import { useState, useEffect, useCallback } from "react";
 import { COLORS, type LeaderboardEntry, type BoxDropRating } from "@/lib/types";
-import { fetchLeaderboard, LEADERBOARD_SAVED_EVENT } from "@/lib/api";
+import { fetchLeaderboard, subscribeState, LEADERBOARD_SAVED_EVENT } from "@/lib/api";
 
 function boxDropPoints(r: BoxDropRating): number {
   if (r === "fullyIn") return 5;
@@ -33,10 +33,15 @@ export function LeaderboardView({ backgroundNumber = "1" }: LeaderboardViewProps
     setEntries(list);
   }, []);
 
+  // Refetch when the server announces a saved run; slow poll only as a fallback
   useEffect(() => {
     load();
-    const interval = setInterval(load, 2000);
-    return () => clearInterval(interval);
+    const unsubscribe = subscribeState(() => {}, load);
+    const interval = setInterval(load, 30000);
+    return () => {
+      unsubscribe();
+      clearInterval(interval);
+    };
   }, [load]);
 
   // Refetch when a run is saved (from Live tab) or when user switches back to this tab
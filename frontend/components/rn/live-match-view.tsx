@@ -10,7 +10,7 @@ import {
 } from "react-native";
 import { COLORS, type MatchState } from "@/lib/types";
 import {
-  fetchState,
+  subscribeState,
   apiSetTeam,
   apiStartTimer,
   apiStopTimer,
@@ -53,22 +53,16 @@ export function LiveMatchView({ backgroundNumber = "8", onTeamSet }: LiveMatchVi
 
   useEffect(() => setMounted(true), []);
 
-  // Poll state from API; sync team to parent once on first successful fetch
+  // Live state pushed from the API; sync team to parent once on the first snapshot
   useEffect(() => {
-    const poll = async () => {
-      const next = await fetchState();
-      if (next) {
-        setState(next);
-        if (!initialTeamSynced.current && next.teamNumber) {
-          const raw = next.teamNumber.replace(/^Team\s*/i, "").trim() || next.teamNumber;
-          onTeamSet?.(raw);
-          initialTeamSynced.current = true;
-        }
+    return subscribeState((next) => {
+      setState(next);
+      if (!initialTeamSynced.current && next.teamNumber) {
+        const raw = next.teamNumber.replace(/^Team\s*/i, "").trim() || next.teamNumber;
+        onTeamSet?.(raw);
+        initialTeamSynced.current = true;
       }
-    };
-    const interval = setInterval(poll, 500);
-    poll();
-    return () => clearInterval(interval);
+    });
   }, [onTeamSet]);
 
   const formatTime = (seconds: number) => {
@@ -8,7 +8,7 @@ import {
   Dimensions,
 } from "react-native";
 import { COLORS, type MatchState } from "@/lib/types";
-import { fetchState } from "@/lib/api";
+import { subscribeState } from "@/lib/api";
 
 const { width: SCREEN_WIDTH } = Dimensions.get("window");
 
@@ -28,15 +28,7 @@ export function ScoreBreakdownView({ backgroundNumber = "8" }: ScoreBreakdownVie
     boxDrop2: "none",
   });
 
-  useEffect(() => {
-    const poll = async () => {
-      const next = await fetchState();
-      if (next) setState(next);
-    };
-    const interval = setInterval(poll, 500);
-    poll();
-    return () => clearInterval(interval);
-  }, []);
+  useEffect(() => subscribeState(setState), []);
 
   // Use backend score breakdown (obstacles, under60=5, box_drop = sum of up to 2 drops: 5/4/2/1 each)
   const bd = state.scoreBreakdown;
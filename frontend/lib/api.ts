@@ -8,19 +8,28 @@ import type { MatchState, LeaderboardEntry, BoxDropRating } from "./types";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
-export { API_BASE };
+/** Optional track ID when one backend serves several arenas (?arena=); unset = backend default arena. */
+const ARENA = process.env.NEXT_PUBLIC_ARENA || "";
+const ARENA_QUERY = ARENA ? `?arena=${encodeURIComponent(ARENA)}` : "";
+
+export { API_BASE, ARENA };
 
 export interface BackendState {
   team_number?: string;
   team_display?: string;
   score_total?: number;
   t_elapsed_s?: number;
+  timer_started_at?: number | null;
   timer_running?: boolean;
+  match_ended?: boolean;
   score_breakdown?: { obstacles?: number; completed_under_60?: number; box_drop?: number };
   obstacle_touches?: number;
   completed_under_60?: boolean;
   box_drop_1?: string | null;
   box_drop_2?: string | null;
+  /** Only on /api/state/stream events */
+  version?: number;
+  server_time?: number;
 }
 
 function mapBoxDropBackendToFrontend(value: string | null | undefined): BoxDropRating {
@@ -63,7 +72,7 @@ export function mapBoxDropFrontendToBackend(value: BoxDropRating): string | null
 
 export async function fetchState(): Promise<MatchState | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/state`);
+    const res = await fetch(`${API_BASE}/api/state${ARENA_QUERY}`);
     if (!res.ok) return null;
     const data: BackendState = await res.json();
     return mapBackendStateToMatchState(data);
@@ -72,6 +81,86 @@ export async function fetchState(): Promise<MatchState | null> {
   }
 }
 
+/**
+ * Live match state from /api/state/stream (SSE): one snapshot, then diffs of changed keys.
+ * The timer ticks locally from timer_started_at (corrected by server_time), so no per-second traffic.
+ * Falls back to polling /api/state with If-None-Match when EventSource is unavailable or the stream dies.
+ * onLeaderboard fires when a run is saved. Returns an unsubscribe function.
+ */
+export function subscribeState(
+  onState: (state: MatchState) => void,
+  onLeaderboard?: () => void
+): () => void {
+  let data: BackendState | null = null;
+  let clockOffset = 0; // server clock - local clock (s)
+  let etag: string | null = null;
+  let pollTimer: ReturnType<typeof setInterval> | null = null;
+  let es: EventSource | null = null;
+
+  const emit = () => {
+    if (!data) return;
+    if (data.timer_running && data.timer_started_at != null) {
+      const now = Date.now() / 1000 + clockOffset;
+      data.t_elapsed_s = Math.max(0, Math.round(now - data.timer_started_at));
+    }
+    onState(mapBackendStateToMatchState(data));
+  };
+
+  const apply = (next: BackendState) => {
+    if (next.server_time != null) clockOffset = next.server_time - Date.now() / 1000;
+    data = { ...(data ?? {}), ...next };
+    emit();
+  };
+
+  const poll = async () => {
+    try {
+      const res = await fetch(`${API_BASE}/api/state${ARENA_QUERY}`, { headers: etag ? { "If-None-Match": etag } : {} });
+      if (res.status === 304 || !res.ok) return;
+      etag = res.headers.get("ETag");
+      apply(await res.json());
+    } catch {
+      // keep last state
+    }
+  };
+
+  const startPolling = () => {
+    if (pollTimer) return;
+    pollTimer = setInterval(poll, 500);
+    poll();
+  };
+
+  const tick = setInterval(() => {
+    if (data?.timer_running) emit();
+  }, 250);
+
+  if (typeof EventSource !== "undefined") {
+    es = new EventSource(`${API_BASE}/api/state/stream${ARENA_QUERY}`);
+    es.addEventListener("snapshot", (e) => {
+      data = null;
+      apply(JSON.parse((e as MessageEvent).data));
+    });
+    es.addEventListener("diff", (e) => apply(JSON.parse((e as MessageEvent).data)));
+    if (onLeaderboard) es.addEventListener("leaderboard", () => onLeaderboard());
+    es.onopen = () => {
+      if (pollTimer) {
+        clearInterval(pollTimer);
+        pollTimer = null;
+      }
+    };
+    es.onerror = () => {
+      if (es?.readyState === EventSource.CLOSED) startPolling();
+    };
+  } else {
+    startPolling();
+  }
+
+  return () => {
+    clearInterval(tick);
+    if (pollTimer) clearInterval(pollTimer);
+    es?.close();
+  };
+}
+
 export async function fetchLeaderboard(): Promise<LeaderboardEntry[]> {
   try {
     const res = await fetch(`${API_BASE}/api/leaderboard`);
@@ -111,7 +200,7 @@ function formatTime(seconds: number): string {
 
 export async function apiStartTimer(): Promise<MatchState | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/timer/start`, { method: "POST" });
+    const res = await fetch(`${API_BASE}/api/timer/start${ARENA_QUERY}`, { method: "POST" });
     if (!res.ok) return null;
     const data: BackendState = await res.json();
     return mapBackendStateToMatchState(data);
@@ -122,7 +211,7 @@ export async function apiStartTimer(): Promise<MatchState | null> {
 
 export async function apiStopTimer(): Promise<MatchState | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/timer/stop`, { method: "POST" });
+    const res = await fetch(`${API_BASE}/api/timer/stop${ARENA_QUERY}`, { method: "POST" });
     if (!res.ok) return null;
     const data: BackendState = await res.json();
     return mapBackendStateToMatchState(data);
@@ -133,7 +222,7 @@ export async function apiStopTimer(): Promise<MatchState | null> {
 
 export async function apiResetTimer(): Promise<MatchState | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/timer/reset`, { method: "POST" });
+    const res = await fetch(`${API_BASE}/api/timer/reset${ARENA_QUERY}`, { method: "POST" });
     if (!res.ok) return null;
     const data: BackendState = await res.json();
     return mapBackendStateToMatchState(data);
@@ -144,7 +233,7 @@ export async function apiResetTimer(): Promise<MatchState | null> {
 
 export async function apiSetTeam(team: string): Promise<MatchState | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/set_team`, {
+    const res = await fetch(`${API_BASE}/api/set_team${ARENA_QUERY}`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ team_number: team, team }), // backend accepts both
@@ -164,7 +253,7 @@ export async function apiSetBreakdown(payload: {
   box_drop_2?: string | null;
 }): Promise<MatchState | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/test/set_breakdown`, {
+    const res = await fetch(`${API_BASE}/api/test/set_breakdown${ARENA_QUERY}`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(payload),
@@ -182,7 +271,7 @@ export const LEADERBOARD_SAVED_EVENT = "leaderboard-saved";
 
 export async function apiSaveRun(): Promise<LeaderboardEntry[] | null> {
   try {
-    const res = await fetch(`${API_BASE}/api/test/save_run`, { method: "POST" });
+    const res = await fetch(`${API_BASE}/api/test/save_run${ARENA_QUERY}`, { method: "POST" });
     if (!res.ok) return null;
     const data = await res.json();
     const list = Array.isArray(data.leaderboard) ? data.leaderboard : [];
@@ -209,7 +298,7 @@ export async function apiSaveRun(): Promise<LeaderboardEntry[] | null> {
 
 export async function apiCommentaryPush(): Promise<boolean> {
   try {
-    const res = await fetch(`${API_BASE}/api/commentary/push`, { method: "POST" });
+    const res = await fetch(`${API_BASE}/api/commentary/push${ARENA_QUERY}`, { method: "POST" });
     if (!res.ok) return false;
     const data = await res.json();
     return data.pushed === true;
@@ -94,17 +94,14 @@ def main():
     ]
     # ========== END DEMO payloads ==========
 
+    # DEMO: Push each update as it would arrive live and comment on it (the runner keeps only the newest
+    # MAX_PAYLOADS_PER_CALL buffered payloads, so pushing them all up front would supersede the early ones)
+    print("Running commentary (DEMO: simulated full game)...")
     for p in demo_payloads:
         runner.push(p)
-
-    # DEMO: Run commentary for each batch (up to MAX_PAYLOADS_PER_CALL per tick)
-    print("Running commentary (DEMO: simulated full game)...")
-    for _ in range(3):  # Up to 3 batches for 6 payloads
         if runner.tick():
             while tts.is_playing():
                 time.sleep(0.1)
-        else:
-            break
     print("Done. (Remove run_commentary_demo.py or the DEMO payloads when using real telemetry.)")
 
 
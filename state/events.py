@@ -0,0 +1,143 @@
+"""Append-only match event log. Every MatchState mutation is one timestamped event; state is a fold over them."""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, NamedTuple
+
+# Event kinds (data fields in brackets)
+RESET = "reset"                    # new match [team_number]
+TIMER_STARTED = "timer_started"
+TIMER_STOPPED = "timer_stopped"    # [elapsed_s]
+TEAM = "team"                      # [team_number]
+BREAKDOWN = "breakdown"            # any of [obstacle_touches, completed_under_60, box_drop_1, box_drop_2]
+OBSTACLE_TOUCH = "obstacle_touch"
+BOX_DROP = "box_drop"              # [rating]
+
+
+class MatchEvent(NamedTuple):
+    seq: int                        # per-arena, monotonic across matches
+    t: float                        # epoch seconds
+    kind: str
+    data: dict[str, Any] | None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"seq": self.seq, "t": self.t, "kind": self.kind, "data": self.data}
+
+
+_new_event = tuple.__new__  # skips the NamedTuple __new__ wrapper on the write path
+
+
+class MatchLog:
+    """Events of one match, from its reset event on (EventLog.record appends to events)."""
+
+    def __init__(self, match_id: str, arena_id: str):
+        self.match_id = match_id
+        self.arena_id = arena_id
+        self.events: list[MatchEvent] = []
+
+    @property
+    def started_at(self) -> float | None:
+        """Epoch time of the first timer start (match clock zero), if the timer ever ran."""
+        for ev in self.events:
+            if ev.kind == TIMER_STARTED:
+                return ev.t
+        return None
+
+    def clock_origin(self) -> float:
+        """Zero of the match clock: the timer start, else the first event."""
+        started = self.started_at
+        if started is not None:
+            return started
+        return self.events[0].t if self.events else 0.0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "match_id": self.match_id,
+            "arena": self.arena_id,
+            "events": len(self.events),
+            "first_t": self.events[0].t if self.events else None,
+            "last_t": self.events[-1].t if self.events else None,
+            "timer_started_at": self.started_at,
+        }
+
+
+class _FileWriter:
+    """Background thread that appends events as JSON lines to <directory>/<match_id>.jsonl,
+    so the mutation path only pays for a queue put."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        threading.Thread(target=self._run, name="event-log-writer", daemon=True).start()
+
+    def put(self, match_id: str, event: MatchEvent) -> None:
+        self._queue.put((match_id, event))
+
+    def _run(self) -> None:
+        handles: dict[str, Any] = {}
+        while True:
+            match_id, event = self._queue.get()
+            try:
+                fh = handles.get(match_id)
+                if fh is None:
+                    for old in handles.values():
+                        old.close()  # matches are sequential per arena; keep one file open
+                    handles.clear()
+                    fh = handles[match_id] = open(self.directory / f"{match_id}.jsonl", "a", encoding="utf-8")
+                fh.write(json.dumps(event.to_dict(), separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    fh.flush()
+            except OSError as e:
+                print(f"[Events] Write failed for {match_id}: {e}")
+
+
+class EventLog:
+    """Per-arena log: the current match plus the last max_matches finished ones (older ones drop off).
+    With directory set, every event is also appended to a per-match JSONL file by a background thread."""
+
+    def __init__(self, arena_id: str, max_matches: int = 50, directory: Path | None = None):
+        self.arena_id = arena_id
+        self._matches: deque[MatchLog] = deque(maxlen=max(1, max_matches))
+        self._by_id: dict[str, MatchLog] = {}
+        self._seq = 0
+        self._match_count = 0
+        self._writer = _FileWriter(Path(directory) / arena_id) if directory else None
+
+    @property
+    def current(self) -> MatchLog | None:
+        return self._matches[-1] if self._matches else None
+
+    def record(self, kind: str, data: dict[str, Any] | None = None, t: float | None = None) -> MatchEvent:
+        """Append one event to the current match (a reset event opens a new match). O(1).
+        Callers serialise writes (MatchState holds its lock)."""
+        if kind == RESET or not self._matches:
+            self._open_match(t)
+        self._seq += 1
+        event = _new_event(MatchEvent, (self._seq, time.time() if t is None else t, kind, data))
+        log = self._matches[-1]
+        log.events.append(event)
+        if self._writer is not None:
+            self._writer.put(log.match_id, event)
+        return event
+
+    def _open_match(self, t: float | None) -> None:
+        self._match_count += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(time.time() if t is None else t))
+        log = MatchLog(f"{self.arena_id}-{stamp}-{self._match_count}", self.arena_id)
+        if len(self._matches) == self._matches.maxlen:
+            self._by_id.pop(self._matches[0].match_id, None)
+        self._matches.append(log)
+        self._by_id[log.match_id] = log
+
+    def get(self, match_id: str | None = None) -> MatchLog | None:
+        """Match by ID (None = current match)."""
+        if match_id is None:
+            return self.current
+        return self._by_id.get(match_id)
+
+    def matches(self) -> list[MatchLog]:
+        return list(self._matches)
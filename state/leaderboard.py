@@ -0,0 +1,184 @@
+"""In-memory leaderboard kept sorted on insert, so reads never re-sort."""
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any
+
+# Serialised pages kept per leaderboard version (least recently used dropped first)
+JSON_CACHE_PAGES = 64
+
+
+def rank_key(entry: dict[str, Any], seq: int) -> tuple:
+    """Order: higher score first, then faster time, then fewer obstacle touches, then earlier save."""
+    return (-entry.get("score_total", 0), entry.get("t_elapsed_s", 0), entry.get("obstacle_touches", 0), seq)
+
+
+def parse_cursor(after: str) -> tuple[float, float, int, str]:
+    """'score,t_elapsed_s,obstacle_touches,id' (the next_cursor of the previous page) -> tuple. Raises ValueError.
+    id is the run's MongoDB _id, or its save sequence number for the in-memory index."""
+    parts = after.split(",")
+    if len(parts) != 4:
+        raise ValueError("cursor must be score,t_elapsed_s,obstacle_touches,id")
+    return float(parts[0]), float(parts[1]), int(parts[2]), parts[3]
+
+
+def format_cursor(score: float, t_elapsed_s: float, obstacle_touches: int, row_id: Any) -> str:
+    return f"{score:g},{t_elapsed_s:g},{obstacle_touches},{row_id}"
+
+
+def _json_default(value: Any) -> str:
+    """datetimes (created_at of MongoDB runs) as ISO 8601, like FastAPI's encoder."""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _key_cursor(key: tuple) -> str:
+    return format_cursor(-key[0], key[1], key[2], key[3])
+
+
+class _TeamStats:
+    """Running aggregates for one team, updated per saved run."""
+    __slots__ = ("best_key", "best", "attempts", "total_time")
+
+    def __init__(self):
+        self.best_key: tuple | None = None
+        self.best: dict[str, Any] | None = None
+        self.attempts = 0
+        self.total_time = 0.0
+
+    def as_row(self) -> dict[str, Any]:
+        """The team's best run plus attempts / avg_t_elapsed_s (same shape as the MongoDB pipeline)."""
+        return {
+            **self.best,
+            "attempts": self.attempts,
+            "avg_t_elapsed_s": round(self.total_time / self.attempts, 2) if self.attempts else 0.0,
+        }
+
+
+class LeaderboardIndex:
+    """
+    Runs sorted by rank_key, maintained with bisect on every add (O(log n) search + one list insert).
+    top_k / page read the sorted list directly; serialised JSON pages are cached until the
+    next add, so repeated polls from many screens cost a dict lookup.
+    Per-team aggregates (best run, attempts, average time) are updated on add, and the teams' best keys
+    are kept in a second sorted list, so the best-run-per-team view is a slice and team_rank a bisect.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: list[tuple] = []
+        self._entries: list[dict[str, Any]] = []
+        self._teams: dict[str, _TeamStats] = {}
+        self._team_keys: list[tuple] = []  # best rank_key of each team, sorted
+        self._team_order: list[str] = []   # team_number for each _team_keys slot
+        self._seq = 0
+        self._json_cache: OrderedDict[tuple[int, int | None, bool], bytes] = OrderedDict()
+        self.version = 0  # bumped on every add
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: dict[str, Any]) -> int:
+        """Insert one run; returns its 1-based rank."""
+        with self._lock:
+            self._seq += 1
+            key = rank_key(entry, self._seq)
+            i = bisect_left(self._keys, key)
+            self._keys.insert(i, key)
+            self._entries.insert(i, entry)
+            self._update_team(str(entry.get("team_number", "")), key, entry)
+            self._json_cache.clear()
+            self.version += 1
+            return i + 1
+
+    def _update_team(self, team: str, key: tuple, entry: dict[str, Any]) -> None:
+        """Caller holds _lock."""
+        stats = self._teams.get(team)
+        if stats is None:
+            stats = self._teams[team] = _TeamStats()
+        stats.attempts += 1
+        stats.total_time += entry.get("t_elapsed_s", 0) or 0
+        if stats.best_key is not None and key >= stats.best_key:
+            return
+        if stats.best_key is not None:
+            j = bisect_left(self._team_keys, stats.best_key)
+            del self._team_keys[j], self._team_order[j]
+        stats.best_key, stats.best = key, entry
+        j = bisect_left(self._team_keys, key)
+        self._team_keys.insert(j, key)
+        self._team_order.insert(j, team)
+
+    def top_k(self, k: int) -> list[dict[str, Any]]:
+        with self._lock:
+            return self._entries[:max(0, k)]
+
+    def page(self, offset: int = 0, limit: int | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            offset = max(0, offset)
+            return self._entries[offset:] if limit is None else self._entries[offset:offset + max(0, limit)]
+
+    def page_after(self, after: str | None, limit: int) -> tuple[list[dict[str, Any]], str | None]:
+        """Cursor pagination: up to limit runs after the cursor (see parse_cursor), plus the next cursor
+        (None on the last page). Raises ValueError for a malformed cursor."""
+        key = None
+        if after:
+            score, t, touches, seq = parse_cursor(after)
+            key = (-score, t, touches, int(seq))
+        limit = max(0, limit)
+        with self._lock:
+            i = 0 if key is None else bisect_right(self._keys, key)
+            rows = self._entries[i:i + limit]
+            end = i + len(rows)
+            next_key = self._keys[end - 1] if rows and end < len(self._keys) else None
+        return rows, None if next_key is None else _key_cursor(next_key)
+
+    def cursor_at(self, index: int) -> str | None:
+        """Cursor that continues after the run at index (None if that is the last run)."""
+        with self._lock:
+            if index < 0 or index >= len(self._keys) - 1:
+                return None
+            return _key_cursor(self._keys[index])
+
+    def all(self) -> list[dict[str, Any]]:
+        return self.page()
+
+    def team_rank(self, team_number: str | int) -> tuple[int, int, dict[str, Any]] | None:
+        """(1-based rank among teams, number of teams, best-run row) for the team, ranked by each team's best
+        run as in teams(); None if the team has no runs."""
+        with self._lock:
+            stats = self._teams.get(str(team_number))
+            if stats is None:
+                return None
+            i = bisect_left(self._team_keys, stats.best_key)
+            return i + 1, len(self._team_keys), stats.as_row()
+
+    def teams(self, offset: int = 0, limit: int | None = None) -> list[dict[str, Any]]:
+        """One row per team: its best run plus attempts and avg_t_elapsed_s, in leaderboard order."""
+        with self._lock:
+            offset = max(0, offset)
+            end = None if limit is None else offset + max(0, limit)
+            return [self._teams[t].as_row() for t in self._team_order[offset:end]]
+
+    def page_json(self, offset: int = 0, limit: int | None = None, per_team: bool = False) -> bytes:
+        """JSON array for page(offset, limit) (or teams(offset, limit)), serialised once per leaderboard version.
+        offset / limit are clamped to the rows that exist, so every query past the end shares one key, and
+        at most JSON_CACHE_PAGES pages are kept."""
+        with self._lock:
+            version = self.version
+            total = len(self._team_order) if per_team else len(self._entries)
+            offset = min(max(0, offset), total)
+            if limit is not None and offset + max(0, limit) >= total:
+                limit = None  # the rest of the board
+            cache_key = (offset, None if limit is None else max(0, limit), per_team)
+            body = self._json_cache.get(cache_key)
+            if body is not None:
+                self._json_cache.move_to_end(cache_key)
+                return body
+        rows = self.teams(offset, limit) if per_team else self.page(offset, limit)
+        body = json.dumps(rows, separators=(",", ":"), default=_json_default).encode()
+        with self._lock:
+            if self.version == version:
+                self._json_cache[cache_key] = body
+                while len(self._json_cache) > JSON_CACHE_PAGES:
+                    self._json_cache.popitem(last=False)
+        return body
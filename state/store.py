@@ -1,7 +1,14 @@
-"""In-memory match state: timer, team number, score breakdown (obstacles, completed_under_60, box_drops)."""
+"""In-memory match state: timer, team number, score breakdown (obstacles, completed_under_60, box_drops).
+One MatchState per arena (track); ArenaRegistry maps arena IDs to their state and video source."""
 import time
 import threading
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, NamedTuple
+
+from config.settings import Settings
+from state import events
+from state.events import EventLog, MatchEvent, MatchLog
+from state.leaderboard import LeaderboardIndex
 
 # Box drop rubric: up to two drops per match, each rated 5/4/2/1
 # 5=fully in area, 4=part touching edge but not outside, 2=less than half outside, 1=most outside
@@ -14,10 +21,40 @@ BOX_DROP_POINTS = {
 }
 
 
+class StateSnapshot(NamedTuple):
+    """Immutable view of MatchState after one mutation. Only the running timer is derived at read time."""
+    version: int
+    state: Mapping[str, Any]        # read-only; t_elapsed_s is the value at snapshot time
+    running_since: float | None     # epoch start while the clock is ticking, else None
+
+    def elapsed_s(self) -> int:
+        """Displayed seconds (same rounding as get_state()['t_elapsed_s'])."""
+        if self.running_since is not None:
+            return int(round(time.time() - self.running_since))
+        return self.state["t_elapsed_s"]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Plain, mutable copy with t_elapsed_s brought up to date."""
+        state = {k: _plain(v) for k, v in self.state.items()}
+        if self.running_since is not None:
+            state["t_elapsed_s"] = self.elapsed_s()
+        return state
+
+
 class MatchState:
-    """Single source of truth for match state. Thread-safe."""
+    """Single source of truth for match state. Thread-safe.
 
-    def __init__(self):
+    Writers take the lock and publish a new StateSnapshot (copy-on-write); readers grab the current
+    snapshot by reference, with no lock and no recomputation of the score."""
+
+    def __init__(
+        self,
+        arena_id: str = Settings.DEFAULT_ARENA,
+        leaderboard: LeaderboardIndex | None = None,
+        event_log: EventLog | bool = True,
+    ):
+        """event_log: an EventLog, True for a new one from Settings, or False for a scratch state (replays)."""
+        self.arena_id = arena_id
         self._lock = threading.RLock()  # RLock so get_state() can call get_elapsed_s() etc. without deadlock
         self.timer_started_at: float | None = None
         self.timer_stopped_at_elapsed_s: float | None = None  # frozen time when match ended
@@ -27,36 +64,157 @@ class MatchState:
         self.completed_under_60: bool = False
         self.box_drop_1: str | None = None  # first drop: fully_in | edge_touching | less_than_half_out | mostly_out | None
         self.box_drop_2: str | None = None  # second drop (optional)
-        self._leaderboard: list[dict[str, Any]] = []
+        # Shared by every arena; it has its own lock, so saving a run never waits on another arena's state lock
+        self.leaderboard = leaderboard if leaderboard is not None else LeaderboardIndex()
+        self._version = 0  # bumped on every mutation; lets readers skip get_state() when nothing changed
+        self._listeners: list[Callable[[int, dict[str, Any]], None]] = []
+        if event_log is True:
+            event_log = EventLog(arena_id, Settings.EVENT_LOG_MAX_MATCHES, Settings.EVENT_LOG_DIR)
+        self.event_log: EventLog | None = event_log or None
+        if self.event_log is not None:
+            self.event_log.record(events.RESET, {"team_number": self.team_number})
+        self._snapshot = self._build_snapshot()
+
+    @property
+    def version(self) -> int:
+        """Monotonic mutation counter. Safe to read without the lock (single int read)."""
+        return self._version
+
+    def snapshot(self) -> StateSnapshot:
+        """Current immutable snapshot (atomic reference read, no lock)."""
+        return self._snapshot
+
+    def changed_since(self, version: int) -> bool:
+        return self._snapshot.version != version
+
+    def _build_snapshot(self) -> StateSnapshot:
+        """Caller holds the lock (or is __init__)."""
+        frozen = self.timer_stopped_at_elapsed_s
+        running_since = self.timer_started_at if frozen is None else None
+        elapsed = frozen if frozen is not None else 0.0
+        breakdown = self.compute_score_breakdown()
+        state = {
+            "team_number": self.team_number,
+            "team_display": f"Team {self.team_number}",
+            "timer_started_at": self.timer_started_at,
+            "t_elapsed_s": int(round(elapsed)),
+            "timer_running": self.timer_started_at is not None,
+            "match_ended": self.match_ended,
+            "score_total": sum(breakdown.values()),
+            "score_breakdown": MappingProxyType(breakdown),
+            "obstacle_touches": self.obstacle_touches,
+            "completed_under_60": self.completed_under_60,
+            "box_drop_1": self.box_drop_1,
+            "box_drop_2": self.box_drop_2,
+        }
+        return StateSnapshot(self._version, MappingProxyType(state), running_since)
+
+    def add_listener(self, listener: Callable[[int, dict[str, Any]], None]) -> None:
+        """listener(version, diff) is called after every mutation with the keys of get_state() that changed.
+        It runs under the state lock, so it must be quick and must not call back into MatchState."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, dict[str, Any]], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _changed(self) -> None:
+        """Caller holds the lock: bump the version, swap in a new snapshot and publish the diff to listeners.
+        The diff carries snapshot values, so a running timer is never in it (clients derive it)."""
+        self._version += 1
+        prev = self._snapshot.state
+        self._snapshot = snap = self._build_snapshot()
+        if not self._listeners:
+            return
+        diff = {k: _plain(v) for k, v in snap.state.items() if k not in prev or prev[k] != v}
+        for listener in list(self._listeners):
+            try:
+                listener(self._version, diff)
+            except Exception as e:
+                print(f"[State] Listener error: {e}")
+
+    def _commit(self, kind: str, data: dict[str, Any] | None = None, t: float | None = None) -> MatchEvent:
+        """Caller holds the lock: append the event to the log, fold it into the fields, publish a snapshot."""
+        event = self.event_log.record(kind, data, t)
+        self._apply(event)
+        self._changed()
+        return event
+
+    def _apply(self, event: MatchEvent) -> None:
+        """Fold one event into the fields. Live writes and replays both go through here."""
+        _APPLY[event.kind](self, event.t, event.data or _NO_DATA)
+
+    def _apply_reset(self, t: float, data: dict[str, Any]) -> None:
+        self.timer_started_at = None
+        self.timer_stopped_at_elapsed_s = None
+        self.match_ended = False
+        self.obstacle_touches = 0
+        self.completed_under_60 = False
+        self.box_drop_1 = None
+        self.box_drop_2 = None
+        if "team_number" in data:
+            self.team_number = data["team_number"]
+
+    def _apply_timer_started(self, t: float, data: dict[str, Any]) -> None:
+        if self.timer_started_at is None:
+            self.timer_started_at = t
+
+    def _apply_timer_stopped(self, t: float, data: dict[str, Any]) -> None:
+        self.timer_stopped_at_elapsed_s = data["elapsed_s"]
+        self.timer_started_at = None
+        self.match_ended = True
+
+    def _apply_team(self, t: float, data: dict[str, Any]) -> None:
+        self.team_number = data["team_number"]
+
+    def _apply_breakdown(self, t: float, data: dict[str, Any]) -> None:
+        if "obstacle_touches" in data:
+            self.obstacle_touches = max(0, data["obstacle_touches"])
+        if "completed_under_60" in data:
+            self.completed_under_60 = data["completed_under_60"]
+        if "box_drop_1" in data:
+            self.box_drop_1 = data["box_drop_1"] if data["box_drop_1"] in BOX_DROP_POINTS else None
+        if "box_drop_2" in data:
+            self.box_drop_2 = data["box_drop_2"] if data["box_drop_2"] in BOX_DROP_POINTS else None
+
+    def _apply_obstacle_touch(self, t: float, data: dict[str, Any]) -> None:
+        self.obstacle_touches += 1
+
+    def _apply_box_drop(self, t: float, data: dict[str, Any]) -> None:
+        if data["slot"] == 1:
+            self.box_drop_1 = data["rating"]
+        else:
+            self.box_drop_2 = data["rating"]
 
     def set_timer_started(self) -> None:
         """Start the match timer (call on key press or button). Idempotent after first call."""
         with self._lock:
             if self.timer_started_at is None:
-                self.timer_started_at = time.time()
+                self._commit(events.TIMER_STARTED)
 
     def set_timer_stopped(self) -> None:
         """End the match: freeze timer at current elapsed, set match_ended."""
         with self._lock:
-            elapsed = self.get_elapsed_s()
-            self.timer_stopped_at_elapsed_s = elapsed
-            self.timer_started_at = None
-            self.match_ended = True
+            t = time.time()
+            if self.timer_stopped_at_elapsed_s is not None:
+                elapsed = self.timer_stopped_at_elapsed_s
+            elif self.timer_started_at is not None:
+                elapsed = t - self.timer_started_at
+            else:
+                elapsed = 0.0
+            self._commit(events.TIMER_STOPPED, {"elapsed_s": elapsed}, t)
 
     def reset_for_new_match(self) -> None:
-        """Clear timer and scoring state so the next Start match runs from 0 with no carryover."""
+        """Clear timer and scoring state so the next Start match runs from 0 with no carryover.
+        Opens a new match in the event log; the team number carries over."""
         with self._lock:
-            self.timer_started_at = None
-            self.timer_stopped_at_elapsed_s = None
-            self.match_ended = False
-            self.obstacle_touches = 0
-            self.completed_under_60 = False
-            self.box_drop_1 = None
-            self.box_drop_2 = None
+            self._commit(events.RESET, {"team_number": self.team_number})
 
     def set_team_number(self, team_number: str | int) -> None:
         with self._lock:
-            self.team_number = str(team_number)
+            self._commit(events.TEAM, {"team_number": str(team_number)})
 
     def set_breakdown(
         self,
@@ -65,15 +223,80 @@ class MatchState:
         box_drop_1: str | None = None,
         box_drop_2: str | None = None,
     ) -> None:
+        data = {}
+        if obstacle_touches is not None:
+            data["obstacle_touches"] = obstacle_touches
+        if completed_under_60 is not None:
+            data["completed_under_60"] = completed_under_60
+        if box_drop_1 is not None:
+            data["box_drop_1"] = box_drop_1
+        if box_drop_2 is not None:
+            data["box_drop_2"] = box_drop_2
+        with self._lock:
+            self._commit(events.BREAKDOWN, data)
+
+    def record_obstacle_touch(self) -> int:
+        """Count one obstacle touch (vision engine). Returns the new touch count."""
+        with self._lock:
+            self._commit(events.OBSTACLE_TOUCH)
+            return self.obstacle_touches
+
+    def record_box_drop(self, rating: str) -> int | None:
+        """Fill the next free box drop slot with rating. Returns the slot (1 or 2), or None if both are used."""
+        if rating not in BOX_DROP_POINTS:
+            return None
         with self._lock:
-            if obstacle_touches is not None:
-                self.obstacle_touches = max(0, obstacle_touches)
-            if completed_under_60 is not None:
-                self.completed_under_60 = completed_under_60
-            if box_drop_1 is not None:
-                self.box_drop_1 = box_drop_1 if box_drop_1 in BOX_DROP_POINTS else None
-            if box_drop_2 is not None:
-                self.box_drop_2 = box_drop_2 if box_drop_2 in BOX_DROP_POINTS else None
+            if self.box_drop_1 is None:
+                slot = 1
+            elif self.box_drop_2 is None:
+                slot = 2
+            else:
+                return None
+            self._commit(events.BOX_DROP, {"slot": slot, "rating": rating})
+            return slot
+
+    @property
+    def match_id(self) -> str | None:
+        """ID of the current match in the event log."""
+        log = self.event_log.current if self.event_log is not None else None
+        return log.match_id if log is not None else None
+
+    def _replay(self, log: MatchLog, until: float | None = None) -> Iterator[tuple[MatchEvent, "MatchState"]]:
+        """Fold log's events into a scratch MatchState, yielding after each one."""
+        replica = MatchState(self.arena_id, event_log=False)
+        for event in log.events:
+            if until is not None and event.t > until:
+                break
+            replica._apply(event)
+            yield event, replica
+
+    @staticmethod
+    def _state_dict_at(replica: "MatchState", t: float) -> dict[str, Any]:
+        state = replica._build_snapshot().as_dict()
+        if replica.timer_started_at is not None and replica.timer_stopped_at_elapsed_s is None:
+            state["t_elapsed_s"] = max(0, int(round(t - replica.timer_started_at)))
+        return state
+
+    def state_at(self, t: float, match_id: str | None = None) -> dict[str, Any] | None:
+        """State of a match (default: current) as of epoch time t, folded from its event log. None if unknown."""
+        log = self.event_log.get(match_id) if self.event_log is not None else None
+        if log is None:
+            return None
+        replica = MatchState(self.arena_id, event_log=False)
+        for _, replica in self._replay(log, until=t):
+            pass
+        return self._state_dict_at(replica, t)
+
+    def timeline(self, match_id: str | None = None) -> list[dict[str, Any]] | None:
+        """Every event of a match with the state right after it; t_match is seconds on the match clock."""
+        log = self.event_log.get(match_id) if self.event_log is not None else None
+        if log is None:
+            return None
+        origin = log.clock_origin()
+        return [
+            {**event.to_dict(), "t_match": round(event.t - origin, 3), "state": self._state_dict_at(replica, event.t)}
+            for event, replica in self._replay(log)
+        ]
 
     def get_elapsed_s(self) -> float:
         with self._lock:
@@ -119,28 +342,13 @@ class MatchState:
         }
 
     def get_state(self) -> dict[str, Any]:
-        """Full state for API/HUD: team_number, timer, score, breakdown."""
-        with self._lock:
-            elapsed = self.get_elapsed_s()
-            breakdown = self.compute_score_breakdown()
-            return {
-                "team_number": self.team_number,
-                "team_display": f"Team {self.team_number}",
-                "timer_started_at": self.timer_started_at,
-                "t_elapsed_s": int(round(elapsed)),
-                "timer_running": self.timer_started_at is not None,
-                "match_ended": self.match_ended,
-                "score_total": self.compute_score_total(),
-                "score_breakdown": breakdown,
-                "obstacle_touches": self.obstacle_touches,
-                "completed_under_60": self.completed_under_60,
-                "box_drop_1": self.box_drop_1,
-                "box_drop_2": self.box_drop_2,
-            }
+        """Full state for API/HUD: team_number, timer, score, breakdown. Lock-free: a plain copy of the
+        current snapshot with t_elapsed_s brought up to date."""
+        return self._snapshot.as_dict()
 
-    def save_run_to_leaderboard(self) -> dict[str, Any]:
-        """Append current run to leaderboard; return saved entry."""
-        entry = {
+    def run_entry(self) -> dict[str, Any]:
+        """Current run in leaderboard shape (not saved)."""
+        return {
             "team_number": self.team_number,
             "team_display": f"Team {self.team_number}",
             "score_total": self.compute_score_total(),
@@ -150,20 +358,83 @@ class MatchState:
             "completed_under_60": self.completed_under_60,
             "box_drop_1": self.box_drop_1,
             "box_drop_2": self.box_drop_2,
+            "arena": self.arena_id,
+            "match_id": self.match_id,
         }
-        with self._lock:
-            self._leaderboard.append(entry)
+
+    def save_run_to_leaderboard(self) -> dict[str, Any]:
+        """Append current run to leaderboard; return saved entry."""
+        entry = self.run_entry()
+        self.leaderboard.add(entry)
         return entry
 
     def get_leaderboard(self) -> list[dict[str, Any]]:
-        """Leaderboard sorted by score_total descending."""
-        with self._lock:
-            return sorted(
-                list(self._leaderboard),
-                key=lambda x: x["score_total"],
-                reverse=True,
-            )
+        """Leaderboard sorted by score_total descending, then t_elapsed_s, then obstacle_touches
+        (runs from every arena sharing it)."""
+        return self.leaderboard.all()
+
+    def get_team_leaderboard(self) -> list[dict[str, Any]]:
+        """Best run per team, with attempts and avg_t_elapsed_s, in leaderboard order."""
+        return self.leaderboard.teams()
+
+
+_NO_DATA: dict[str, Any] = {}
+# Event kind -> fold step
+_APPLY = {
+    events.RESET: MatchState._apply_reset,
+    events.TIMER_STARTED: MatchState._apply_timer_started,
+    events.TIMER_STOPPED: MatchState._apply_timer_stopped,
+    events.TEAM: MatchState._apply_team,
+    events.BREAKDOWN: MatchState._apply_breakdown,
+    events.OBSTACLE_TOUCH: MatchState._apply_obstacle_touch,
+    events.BOX_DROP: MatchState._apply_box_drop,
+}
+
+
+def _plain(value: Any) -> Any:
+    """Snapshot values are read-only mappings; hand out plain dicts (JSON-serialisable, safe to mutate)."""
+    return dict(value) if isinstance(value, MappingProxyType) else value
+
+
+class Arena:
+    """One course: its own MatchState (and lock) and video source. The web layer hangs per-arena services
+    (commentary runner, vision engine) on it."""
+
+    def __init__(self, arena_id: str, video_source: int | str, state: MatchState):
+        self.arena_id = arena_id
+        self.video_source = video_source
+        self.state = state
+        self.commentary: Any = None
+        self.vision: Any = None
+
+
+class ArenaRegistry:
+    """Arenas keyed by ID (Settings.ARENAS). All arenas share one in-memory leaderboard."""
+
+    def __init__(self, sources: dict[str, int | str], default_id: str):
+        self.default_id = default_id
+        self.leaderboard = LeaderboardIndex()
+        self._arenas: dict[str, Arena] = {}
+        for arena_id, source in sources.items():
+            self.add(arena_id, source)
+
+    def add(self, arena_id: str, video_source: int | str) -> Arena:
+        arena = Arena(arena_id, video_source, MatchState(arena_id, self.leaderboard))
+        self._arenas[arena_id] = arena
+        return arena
+
+    def get(self, arena_id: str | None = None) -> Arena | None:
+        """Arena by ID (None = default arena); None if the ID is unknown."""
+        return self._arenas.get(arena_id or self.default_id)
+
+    def ids(self) -> list[str]:
+        return list(self._arenas)
+
+    def all(self) -> list[Arena]:
+        return list(self._arenas.values())
+
 
+arenas = ArenaRegistry(Settings.ARENAS, Settings.DEFAULT_ARENA)
 
-# Singleton used by web app and stream
-match_state = MatchState()
+# Default arena's state; single-track code (HUD, scripts) keeps using this singleton
+match_state = arenas.get().state
@@ -0,0 +1,91 @@
+"""CommentaryRunner scheduling against a stub speaker (no Gemini, ElevenLabs or audio device)."""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("elevenlabs")
+pytest.importorskip("sounddevice")
+
+from commentary import commentary_runner, templates
+from commentary.templates import INTRO_LINE, MINUTE_LINE
+from commentary.tts import Utterance
+
+MARK_S = 0.5
+
+
+class StubTTS:
+    cache = None
+
+    def __init__(self):
+        self.spoken: list[str] = []
+
+    def speak(self, text):
+        self.spoken.append(text)
+        return Utterance()
+
+    def speak_stream(self, sentences, started_at=None):
+        self.spoken.extend(sentences)
+        return Utterance(started_at)
+
+    def stop(self):
+        pass
+
+    def is_playing(self):
+        return False
+
+    def queued_seconds(self):
+        return 0.0
+
+
+class StubAI:
+    def stream_commentary(self, payloads):
+        yield "Filler."
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(commentary_runner, "MINUTE_MARK_S", MARK_S)
+    monkeypatch.setattr(templates, "MINUTE_MARK_S", MARK_S)
+    tts = StubTTS()
+    r = commentary_runner.CommentaryRunner(StubAI(), tts, filler_interval_sec=100)
+    worker = threading.Thread(target=r.run_loop, kwargs={"poll_interval": 0.05}, daemon=True)
+    worker.start()
+    yield r, tts
+    r.stop()
+    worker.join(2)
+
+
+def test_minute_line_spoken_at_the_mark_without_a_push(runner):
+    r, tts = runner
+    r.play_intro()
+    time.sleep(MARK_S + 0.3)
+    assert tts.spoken == [INTRO_LINE, MINUTE_LINE]
+
+
+def test_no_minute_line_after_the_match_is_stopped(runner):
+    r, tts = runner
+    r.play_intro()
+    time.sleep(0.1)
+    r.match_stopped()
+    time.sleep(MARK_S + 0.3)
+    assert tts.spoken == [INTRO_LINE]
+    assert r.stats()["buffered"] == 0
+
+
+def test_stalled_gemini_stream_ends_the_reply(monkeypatch):
+    release = threading.Event()
+
+    class StallingAI:
+        def stream_commentary(self, payloads):
+            yield "First."
+            release.wait(5)
+            yield "Too late."
+
+    r = commentary_runner.CommentaryRunner(StallingAI(), StubTTS(), llm_budget_sec=0.2)
+    t0 = time.monotonic()
+    sentences = list(r._llm_sentences([{}], t0, ["Fallback."]))
+    release.set()
+    assert sentences == ["First."]
+    assert time.monotonic() - t0 < 2
@@ -2,6 +2,10 @@ import cv2
 import numpy as np
 import time
 
+from vision.collision import COLLISION_MARGIN_PX, ObstacleDistanceField
+from vision.pipeline import FramePipeline
+from vision.robot_tracker import RobotTracker
+
 # =======================
 # SCORER
 # =======================
@@ -134,7 +138,14 @@ def detect_red_track_and_obstacles(frame, exclude_blue_mask):
 # ROBOT
 # =======================
 
-def detect_robot(frame):
+def detect_robot_blob(frame, roi=None):
+    """Largest green blob as (pos, contour, area) in full-frame coordinates, or (None, None, 0).
+    roi=(x0, y0, x1, y1) limits the search to that window."""
+    x0, y0 = 0, 0
+    if roi is not None:
+        x0, y0, x1, y1 = roi
+        frame = frame[y0:y1, x0:x1]
+
     hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
 
     lower = np.array([40, 100, 100])
@@ -143,30 +154,43 @@ def detect_robot(frame):
     mask = cv2.inRange(hsv, lower, upper)
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8), 1)
 
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours, _ = cv2.findContours(
+        mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0)
+    )
 
     if not contours:
-        return None
+        return None, None, 0
 
     c = max(contours, key=cv2.contourArea)
-    if cv2.contourArea(c) < 300:
-        return None
+    area = cv2.contourArea(c)
+    if area < 300:
+        return None, None, 0
 
     M = cv2.moments(c)
     if M["m00"] == 0:
-        return None
+        return None, None, 0
+
+    return (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])), c, area
+
 
-    return (int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+def detect_robot(frame):
+    return detect_robot_blob(frame)[0]
 
 
 # =======================
 # HELPERS
 # =======================
 
-def check_robot_on_obstacle(robot_pos, obstacles):
+_obstacle_field = ObstacleDistanceField()
+
+
+def check_robot_on_obstacle(robot_pos, obstacles, frame_shape, robot_contour=None, margin=COLLISION_MARGIN_PX):
+    """True if the robot footprint (contour, or just its centroid) is within margin px of an obstacle.
+    Uses the shared distance field, rebuilt only when the obstacle layout changes."""
     if robot_pos is None:
         return False
-    return any(abs(cv2.pointPolygonTest(c, robot_pos, True)) < 20 for c in obstacles)
+    _obstacle_field.update(obstacles, frame_shape)
+    return _obstacle_field.is_touching(robot_pos, robot_contour, margin)
 
 
 def check_if_non_white_in_inner_zone(frame, inner):
@@ -186,18 +210,22 @@ def check_if_non_white_in_inner_zone(frame, inner):
 # MAIN
 # =======================
 
-def main(video_source=0, debug=True):
+def main(video_source=0, debug=True, roi_tracking=False, predictor="velocity", threaded=False):
+    """roi_tracking: search for the robot near its predicted position only (RobotTracker, predictor "velocity"
+    or "kalman"); off by default, like video.py's run_obstacle_course_tracker.
+    threaded: capture / process / display on separate stages (vision.pipeline), printing per-stage latency."""
     cap = cv2.VideoCapture(video_source)
     scorer = SimpleScorer()
+    robot_tracker = RobotTracker(predictor=predictor) if roi_tracking else None
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
+    def process_frame(frame):
         inner, outer, blue_mask = detect_blue_drop_zone(frame)
         red_mask, tracks, obstacle_mask, obstacles = detect_red_track_and_obstacles(frame, blue_mask)
-        robot = detect_robot(frame)
+        if robot_tracker is not None:
+            robot, robot_contour, _ = robot_tracker.update(frame.shape, lambda roi: detect_robot_blob(frame, roi))
+        else:
+            robot, robot_contour, _ = detect_robot_blob(frame)
+        touching = check_robot_on_obstacle(robot, obstacles, frame.shape, robot_contour)
 
         vis = frame.copy()
 
@@ -212,16 +240,49 @@ def main(video_source=0, debug=True):
         cv2.drawContours(vis, obstacles, -1, (0, 0, 255), 3)
 
         if robot:
-            cv2.circle(vis, robot, 12, (0, 255, 255), -1)
+            cv2.circle(vis, robot, 12, (0, 0, 255) if touching else (0, 255, 255), -1)
+        if debug and robot_tracker is not None and robot_tracker.last_roi is not None:
+            x0, y0, x1, y1 = robot_tracker.last_roi
+            cv2.rectangle(vis, (x0, y0), (x1, y1), (255, 255, 0), 1)
+
+        return vis, blue_mask, red_mask, obstacle_mask
 
+    def show(result):
+        vis, blue_mask, red_mask, obstacle_mask = result
         cv2.imshow("Scorer", vis)
         if debug:
             cv2.imshow("Blue Mask", blue_mask)
             cv2.imshow("Red Mask", red_mask)
             cv2.imshow("Obstacle Mask", obstacle_mask)
 
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
+    if threaded:
+        pipeline = FramePipeline(cap, process_frame).start()
+        last_report = time.time()
+        while not pipeline.finished:
+            pkt = pipeline.get_packet(timeout=0.05)
+            if pkt is not None:
+                show(pkt.result)
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+            if pkt is not None:
+                pipeline.frame_displayed(pkt)
+            if debug and time.time() - last_report >= 5.0:
+                print(pipeline.format_report())
+                last_report = time.time()
+        pipeline.stop()
+        print(pipeline.format_report())
+        if pipeline.error is not None:
+            print(f"Pipeline stopped on error: {pipeline.error!r}")
+    else:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            show(process_frame(frame))
+
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
 
     cap.release()
     cv2.destroyAllWindows()
@@ -1,8 +1,96 @@
 import cv2
 import numpy as np
+import queue
 import time
 from collections import deque
 
+from vision.collision import COLLISION_MARGIN_PX, ObstacleDistanceField
+from vision.pipeline import FramePipeline
+from vision.robot_tracker import RobotTracker
+
+PIPELINE_RENDER_QUEUE = 2
+
+# HSV ranges (lower, upper) used by the tracker; built once instead of per call
+BROWN_RANGES = (
+    (np.array([5, 30, 60]), np.array([25, 180, 200])),
+    (np.array([10, 20, 40]), np.array([30, 150, 150])),
+)
+RED_RANGES = (  # red wraps around in HSV
+    (np.array([0, 70, 50]), np.array([10, 255, 255])),
+    (np.array([170, 70, 50]), np.array([180, 255, 255])),
+)
+ROBOT_RANGES = (
+    (np.array([40, 60, 60]), np.array([80, 255, 255])),   # GREEN
+    (np.array([20, 100, 100]), np.array([35, 255, 255])),  # YELLOW
+    (np.array([0, 0, 180]), np.array([180, 60, 255])),    # BRIGHT (white/silver robot)
+)
+
+
+class FrameContext:
+    """
+    Per-frame scratch state for the tracker hot loop:
+    - HSV conversion computed at most once per frame and shared by all detectors
+    - morphology kernels built once
+    - named buffers reused as dst= targets, reallocated only if the frame size changes
+    Call begin(frame) for every new frame (warp_to_birds_eye does this).
+    """
+
+    def __init__(self):
+        self.frame = None
+        self._hsv_valid = False
+        self._buffers = {}
+        self._kernels = {}
+
+    def begin(self, frame):
+        """Start a new frame; cached HSV is invalidated (buffers are kept)."""
+        self.frame = frame
+        self._hsv_valid = False
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype)
+        return buf
+
+    def kernel(self, size):
+        k = self._kernels.get(size)
+        if k is None:
+            k = self._kernels[size] = np.ones((size, size), np.uint8)
+        return k
+
+    def hsv(self, frame, roi=None):
+        """
+        Full-frame HSV buffer of frame, converted once per frame.
+        With roi=(x0, y0, x1, y1) and no full conversion yet this frame, only that region is
+        converted (and only that region of the returned buffer is valid).
+        """
+        if frame is not self.frame:
+            self.begin(frame)
+        if not self._hsv_valid:
+            buf = self.buffer("hsv", frame.shape)
+            if roi is None:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=buf)
+                self._hsv_valid = True
+            else:
+                x0, y0, x1, y1 = roi
+                cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2HSV, dst=buf[y0:y1, x0:x1])
+        return self._buffers["hsv"]
+
+    def in_ranges(self, name, hsv, ranges, roi=None):
+        """OR of inRange over several (lower, upper) pairs, written into buffer `name`.
+        With roi only that region is computed and the returned mask is a view of it."""
+        mask = self.buffer(name, hsv.shape[:2])
+        tmp = self.buffer("in_range_tmp", hsv.shape[:2])
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            hsv, mask, tmp = hsv[y0:y1, x0:x1], mask[y0:y1, x0:x1], tmp[y0:y1, x0:x1]
+        cv2.inRange(hsv, ranges[0][0], ranges[0][1], dst=mask)
+        for lower, upper in ranges[1:]:
+            cv2.inRange(hsv, lower, upper, dst=tmp)
+            cv2.bitwise_or(mask, tmp, dst=mask)
+        return mask
+
+
 class SimpleObstacleCourseTracker:
     """
     Real-time obstacle course tracker with:
@@ -22,6 +110,7 @@ class SimpleObstacleCourseTracker:
         self.obstacle_penalty_count = 0
         self.last_contact_time = 0
         self.contact_cooldown = 1.0  # Seconds between penalty counts
+        self.collision_margin = COLLISION_MARGIN_PX  # Robot footprint to obstacle distance that counts as contact
         
         # Robot tracking
         self.robot_trail = deque(maxlen=50)  # Show trail of robot movement
@@ -29,6 +118,25 @@ class SimpleObstacleCourseTracker:
         # Detected features
         self.obstacles = []
         self.red_path_mask = None
+        self.path_contours = []
+        self.obstacle_field = ObstacleDistanceField()
+
+        # Static-scene mode: path and obstacles are detected once after calibration and only
+        # refreshed every redetect_every frames (0 = never) or when the scene visibly changes
+        self.static_scene = False
+        self.redetect_every = 0
+        self.scene_change_threshold = 0.02  # fraction of thumbnail pixels that changed
+        self.scene_check_every = 10  # frames between change checks (~3x per second at 30 fps)
+        self.scene_redetections = 0
+        self._scene_ref = None  # grayscale thumbnail of the scene at the last detection
+        self._frames_since_detect = 0
+        self.redetect_requested = False  # set from the UI thread; honoured on the next update_scene
+
+        # Optional ROI search around the last/predicted robot position (enable_roi_tracking)
+        self.robot_tracker = None
+
+        # Reused per-frame buffers (HSV, masks, warped and visualization images)
+        self.ctx = FrameContext()
         
     def select_track_corners(self, image):
         """
@@ -89,36 +197,37 @@ class SimpleObstacleCourseTracker:
         return self.homography_matrix
     
     def warp_to_birds_eye(self, image):
-        """Transform to bird's-eye view"""
+        """
+        Transform to bird's-eye view and start a new frame in self.ctx.
+        The result is a reused buffer: it is overwritten by the next call.
+        """
         if self.homography_matrix is None:
+            self.ctx.begin(image)
             return image
         
         warped = cv2.warpPerspective(
-            image, self.homography_matrix, self.mapped_size
+            image, self.homography_matrix, self.mapped_size,
+            dst=self.ctx.buffer("warped", (self.mapped_size[1], self.mapped_size[0], 3))
         )
+        self.ctx.begin(warped)
         return warped
     
     def detect_obstacles(self, warped_image):
         """
         Detect cardboard box obstacles (brown/tan boxes on the track)
         """
-        hsv = cv2.cvtColor(warped_image, cv2.COLOR_BGR2HSV)
+        ctx = self.ctx
+        hsv = ctx.hsv(warped_image)
         
         # Detect brown/cardboard boxes
-        lower_brown1 = np.array([5, 30, 60])
-        upper_brown1 = np.array([25, 180, 200])
-        
-        lower_brown2 = np.array([10, 20, 40])
-        upper_brown2 = np.array([30, 150, 150])
-        
-        mask1 = cv2.inRange(hsv, lower_brown1, upper_brown1)
-        mask2 = cv2.inRange(hsv, lower_brown2, upper_brown2)
-        brown_mask = cv2.bitwise_or(mask1, mask2)
+        raw_mask = ctx.in_ranges("brown_raw", hsv, BROWN_RANGES)
         
         # Clean up mask
-        kernel = np.ones((5, 5), np.uint8)
-        brown_mask = cv2.morphologyEx(brown_mask, cv2.MORPH_CLOSE, kernel)
-        brown_mask = cv2.morphologyEx(brown_mask, cv2.MORPH_OPEN, kernel)
+        kernel = ctx.kernel(5)
+        closed = cv2.morphologyEx(raw_mask, cv2.MORPH_CLOSE, kernel,
+                                  dst=ctx.buffer("brown_closed", raw_mask.shape))
+        brown_mask = cv2.morphologyEx(closed, cv2.MORPH_OPEN, kernel,
+                                      dst=ctx.buffer("brown", raw_mask.shape))
         
         contours, _ = cv2.findContours(
             brown_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
@@ -145,62 +254,46 @@ class SimpleObstacleCourseTracker:
     
     def detect_red_path(self, warped_image):
         """Detect the red path"""
-        hsv = cv2.cvtColor(warped_image, cv2.COLOR_BGR2HSV)
+        ctx = self.ctx
+        hsv = ctx.hsv(warped_image)
         
-        # Red color ranges (red wraps around in HSV)
-        lower_red1 = np.array([0, 70, 50])
-        upper_red1 = np.array([10, 255, 255])
-        
-        lower_red2 = np.array([170, 70, 50])
-        upper_red2 = np.array([180, 255, 255])
-        
-        mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        self.red_path_mask = cv2.bitwise_or(mask1, mask2)
+        raw_mask = ctx.in_ranges("red_raw", hsv, RED_RANGES)
         
         # Clean up
-        kernel = np.ones((5, 5), np.uint8)
         self.red_path_mask = cv2.morphologyEx(
-            self.red_path_mask, cv2.MORPH_CLOSE, kernel
+            raw_mask, cv2.MORPH_CLOSE, ctx.kernel(5),
+            dst=ctx.buffer("red_path", raw_mask.shape)
+        )
+        self.path_contours, _ = cv2.findContours(
+            self.red_path_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
         )
         
         return self.red_path_mask
     
-    def detect_robot(self, warped_image):
+    def detect_robot(self, warped_image, roi=None):
         """
         Detect robot using color marker or motion.
         Default: detects green, yellow, or bright objects.
         Adjust colors based on your robot's marker!
+        roi: optional (x0, y0, x1, y1) search window; results are still in full-frame coordinates.
         """
-        hsv = cv2.cvtColor(warped_image, cv2.COLOR_BGR2HSV)
-        
-        # Try multiple color ranges
-        # GREEN
-        lower_green = np.array([40, 60, 60])
-        upper_green = np.array([80, 255, 255])
-        mask_green = cv2.inRange(hsv, lower_green, upper_green)
-        
-        # YELLOW
-        lower_yellow = np.array([20, 100, 100])
-        upper_yellow = np.array([35, 255, 255])
-        mask_yellow = cv2.inRange(hsv, lower_yellow, upper_yellow)
+        hsv = self.ctx.hsv(warped_image, roi)
         
-        # BRIGHT (white/silver robot)
-        lower_bright = np.array([0, 0, 180])
-        upper_bright = np.array([180, 60, 255])
-        mask_bright = cv2.inRange(hsv, lower_bright, upper_bright)
+        # Try multiple color ranges: green, yellow, bright
+        mask = self.ctx.in_ranges("robot", hsv, ROBOT_RANGES, roi)
+        x0, y0 = (roi[0], roi[1]) if roi is not None else (0, 0)
         
-        # Combine masks
-        mask = cv2.bitwise_or(mask_green, mask_yellow)
-        mask = cv2.bitwise_or(mask, mask_bright)
-        
-        # Remove red path from mask (so we don't detect the path as robot)
-        if self.red_path_mask is not None:
-            mask = cv2.bitwise_and(mask, cv2.bitwise_not(self.red_path_mask))
+        # Remove red path from mask (so we don't detect the path as robot);
+        # both masks are 0/255 so a saturating subtract clears path pixels in place
+        if self.red_path_mask is not None and self.red_path_mask.shape == hsv.shape[:2]:
+            path = self.red_path_mask
+            if roi is not None:
+                path = path[roi[1]:roi[3], roi[0]:roi[2]]
+            cv2.subtract(mask, path, dst=mask)
         
         # Find contours
         contours, _ = cv2.findContours(
-            mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+            mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0)
         )
         
         if contours:
@@ -217,33 +310,107 @@ class SimpleObstacleCourseTracker:
         
         return None, None, 0
     
+    def enable_roi_tracking(self, predictor="velocity", lost_frames=5, **kwargs):
+        """Search for the robot only near where it is expected (see vision.robot_tracker.RobotTracker)."""
+        self.robot_tracker = RobotTracker(predictor=predictor, lost_frames=lost_frames, **kwargs)
+        return self.robot_tracker
+    
+    def locate_robot(self, warped_image):
+        """detect_robot, restricted to the tracker's search window when ROI tracking is enabled."""
+        if self.robot_tracker is None:
+            return self.detect_robot(warped_image)
+        return self.robot_tracker.update(
+            warped_image.shape, lambda roi: self.detect_robot(warped_image, roi)
+        )
+    
+    def _scene_thumbnail(self, warped_image):
+        """Tiny grayscale copy of the scene (1/16 scale) for cheap change detection."""
+        ctx = self.ctx
+        h, w = warped_image.shape[:2]
+        small = cv2.resize(warped_image, (max(1, w // 16), max(1, h // 16)),
+                           dst=ctx.buffer("thumb_bgr", (max(1, h // 16), max(1, w // 16), 3)),
+                           interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY,
+                            dst=ctx.buffer("thumb", small.shape[:2]))
+
+    def _detect_scene(self, warped_image):
+        self.detect_red_path(warped_image)
+        self.detect_obstacles(warped_image)
+        self._scene_ref = self._scene_thumbnail(warped_image).copy()
+        self._frames_since_detect = 0
+        self.redetect_requested = False
+        self.scene_redetections += 1
+
+    def build_static_scene(self, warped_frames):
+        """
+        Detect red path and obstacles once from the average of several warped frames
+        (more robust to noise than one frame) and enable static-scene mode.
+        warped_frames: iterable of bird's-eye frames (may be the same reused buffer each time).
+        """
+        acc = None
+        n = 0
+        for warped in warped_frames:
+            if acc is None:
+                acc = np.zeros(warped.shape, np.float32)
+            cv2.accumulate(warped, acc)
+            n += 1
+        if n == 0:
+            return False
+        mean = cv2.convertScaleAbs(acc, alpha=1.0 / n)
+        self.ctx.begin(mean)
+        self._detect_scene(mean)
+        self.static_scene = True
+        print(f"✓ Static scene built from {n} frame(s): {len(self.obstacles)} obstacle(s)")
+        return True
+
+    def scene_changed(self, warped_image):
+        """True if more than scene_change_threshold of the thumbnail differs from the last detection.
+        The robot alone covers well under 1% of the board, so it does not trigger a re-detect."""
+        if self._scene_ref is None:
+            return True
+        thumb = self._scene_thumbnail(warped_image)
+        diff = cv2.absdiff(thumb, self._scene_ref, dst=self.ctx.buffer("thumb_diff", thumb.shape))
+        cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY, dst=diff)
+        return cv2.countNonZero(diff) > self.scene_change_threshold * diff.size
+
+    def update_scene(self, warped_image):
+        """
+        Per-frame path/obstacle update. Without static-scene mode this re-detects every frame;
+        with it, only on the redetect_every cadence or when scene_changed() fires.
+        Returns True if detection ran this frame.
+        """
+        if not self.static_scene:
+            self.detect_red_path(warped_image)
+            self.detect_obstacles(warped_image)
+            return True
+        self._frames_since_detect += 1
+        n = self._frames_since_detect
+        due = self.redetect_requested or (self.redetect_every and n >= self.redetect_every)
+        check = n % max(1, self.scene_check_every) == 0
+        if due or (check and self.scene_changed(warped_image)):
+            self._detect_scene(warped_image)
+            return True
+        return False
+
     def check_obstacle_collision(self, robot_pos, robot_contour):
         """
-        Check if robot is colliding with obstacles.
+        Check if robot is colliding with obstacles: any point of the robot's footprint
+        within collision_margin px of an obstacle (distance-field lookup, see vision.collision).
         Returns True if collision detected.
         """
         if robot_pos is None or not self.obstacles:
             return False
         
-        current_time = time.time()
-        
-        for obs in self.obstacles:
-            # Check distance between robot and obstacle
-            obs_center = obs['center']
-            distance = np.sqrt(
-                (robot_pos[0] - obs_center[0])**2 + 
-                (robot_pos[1] - obs_center[1])**2
-            )
-            
-            # Collision threshold (adjust based on robot/obstacle size)
-            collision_threshold = 80
-            
-            if distance < collision_threshold:
-                # Apply cooldown to prevent multiple penalties for same collision
-                if current_time - self.last_contact_time > self.contact_cooldown:
-                    self.last_contact_time = current_time
-                    return True
+        # Field is rebuilt only when the obstacle layout changes (once per static scene)
+        self.obstacle_field.update([obs['contour'] for obs in self.obstacles], self.ctx.frame.shape)
+        if not self.obstacle_field.is_touching(robot_pos, robot_contour, self.collision_margin):
+            return False
         
+        # Apply cooldown to prevent multiple penalties for same collision
+        current_time = time.time()
+        if current_time - self.last_contact_time > self.contact_cooldown:
+            self.last_contact_time = current_time
+            return True
         return False
     
     def update_score(self, event_type):
@@ -276,16 +443,14 @@ class SimpleObstacleCourseTracker:
         - Obstacles highlighted
         - Robot position dot
         - Score overlay
+        The result is a reused buffer: it is overwritten by the next call.
         """
-        result = warped_image.copy()
+        result = self.ctx.buffer("vis", warped_image.shape)
+        np.copyto(result, warped_image)
         
-        # Draw red path outline
-        if self.red_path_mask is not None:
-            # Find path contours
-            path_contours, _ = cv2.findContours(
-                self.red_path_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-            )
-            cv2.drawContours(result, path_contours, -1, (0, 255, 255), 2)
+        # Draw red path outline (contours found by detect_red_path)
+        if self.path_contours:
+            cv2.drawContours(result, self.path_contours, -1, (0, 255, 255), 2)
         
         # Draw obstacles with labels
         for i, obs in enumerate(self.obstacles):
@@ -317,11 +482,10 @@ class SimpleObstacleCourseTracker:
             cv2.putText(result, "ROBOT", (robot_pos[0]-30, robot_pos[1]-30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
-        # Draw score overlay panel
-        overlay = result.copy()
+        # Draw score overlay panel: 70% black over the panel area only, darkened in place
         panel_height = 120
-        cv2.rectangle(overlay, (0, 0), (400, panel_height), (0, 0, 0), -1)
-        result = cv2.addWeighted(overlay, 0.7, result, 0.3, 0)
+        panel = result[0:panel_height + 1, 0:401]
+        cv2.addWeighted(panel, 0.3, panel, 0, 0, dst=panel)
         
         # Score text
         cv2.putText(result, f"SCORE: {self.score}", (10, 35),
@@ -350,13 +514,22 @@ class SimpleObstacleCourseTracker:
         self.obstacle_penalty_count = 0
         self.last_contact_time = 0
         self.robot_trail.clear()
+        if self.robot_tracker is not None:
+            self.robot_tracker.reset()
         print("\n🔄 Score reset!")
 
 
-def run_obstacle_course_tracker(video_source=2):
+def run_obstacle_course_tracker(video_source=2, static_scene=False, calibration_frames=10,
+                                redetect_every=0, roi_tracking=False, predictor="velocity", threaded=False):
     """
     Main function to run the tracker
     video_source: 0 for webcam, or path to video file
+    static_scene: detect path/obstacles once after calibration (averaged over calibration_frames)
+        and then only every redetect_every frames (0 = never) or when the scene changes
+    roi_tracking: search for the robot near its predicted position only
+        (predictor: "none" | "velocity" | "kalman")
+    threaded: run capture, processing and display on separate stages (vision.pipeline) so a slow
+        stage drops stale frames instead of backing up the camera; prints per-stage latency
     """
     print("\n" + "="*60)
     print("OBSTACLE COURSE TRACKER")
@@ -364,6 +537,8 @@ def run_obstacle_course_tracker(video_source=2):
     
     # Initialize
     tracker = SimpleObstacleCourseTracker()
+    if roi_tracking:
+        tracker.enable_roi_tracking(predictor=predictor)
     cap = cv2.VideoCapture(video_source)
     
     if not cap.isOpened():
@@ -384,58 +559,130 @@ def run_obstacle_course_tracker(video_source=2):
         return
     
     tracker.compute_homography()
+    if static_scene:
+        tracker.redetect_every = redetect_every
+
+        def calibration_warps():
+            for _ in range(max(1, calibration_frames)):
+                ok, f = cap.read()
+                if not ok:
+                    return
+                yield tracker.warp_to_birds_eye(f)
+
+        tracker.build_static_scene(calibration_warps())
     print("\n✓ Calibration complete!")
     print("\nControls:")
     print("  S - Start run")
     print("  R - Reset score")
+    if static_scene:
+        print("  D - Re-detect path and obstacles")
     print("  Q - Quit")
     print("="*60 + "\n")
     
-    is_running = False
+    state = {"running": False}
+    
+    # Threaded mode: keys are read on the display thread, but the tracker (score, trail, robot tracker)
+    # belongs to the processing thread, so key commands are queued and applied between frames
+    commands = queue.SimpleQueue()
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Vis buffers handed to the render stage in rotation (threaded mode), so the frame on
+    # screen is never the one being drawn into
+    vis_pool = []
+    vis_index = [0]
+    
+    def apply_command(key):
+        if key == ord('s'):
+            tracker.update_score('start')
+            state["running"] = True
+        elif key == ord('r'):
+            tracker.reset_score()
+            state["running"] = False
+        elif key == ord('d') and static_scene:
+            tracker.redetect_requested = True
+        elif key == ord('f'):  # Manual finish
+            if state["running"]:
+                tracker.update_score('finish')
+                state["running"] = False
+    
+    def process_frame(frame):
+        # Apply key commands queued by the display thread (threaded mode)
+        while True:
+            try:
+                apply_command(commands.get_nowait())
+            except queue.Empty:
+                break
         
         # Transform to bird's-eye view
         warped = tracker.warp_to_birds_eye(frame)
         
-        # Detect features
-        tracker.detect_red_path(warped)
-        tracker.detect_obstacles(warped)
+        # Detect features (every frame, or cached in static-scene mode)
+        tracker.update_scene(warped)
         
         # Detect robot
-        robot_pos, robot_contour, robot_area = tracker.detect_robot(warped)
+        robot_pos, robot_contour, robot_area = tracker.locate_robot(warped)
         
         # Check collisions
-        if is_running and robot_pos:
+        if state["running"] and robot_pos:
             if tracker.check_obstacle_collision(robot_pos, robot_contour):
                 tracker.update_score('collision')
         
         # Create visualization
         result = tracker.draw_visualization(warped, robot_pos, robot_contour)
-        
-        # Display
-        cv2.imshow("Bird's-Eye View - Obstacle Course", result)
-        cv2.imshow("Original Camera Feed", frame)
-        
-        # Handle keyboard input
-        key = cv2.waitKey(1) & 0xFF
-        
+        if not threaded:
+            return result
+        if len(vis_pool) < PIPELINE_RENDER_QUEUE + 2:
+            vis_pool.append(np.empty_like(result))
+        out = vis_pool[vis_index[0] % len(vis_pool)]
+        vis_index[0] += 1
+        np.copyto(out, result)
+        return out
+    
+    def handle_key(key):
+        """Returns False to quit."""
         if key == ord('q'):
             print("\n👋 Quitting...")
-            break
-        elif key == ord('s'):
-            tracker.update_score('start')
-            is_running = True
-        elif key == ord('r'):
-            tracker.reset_score()
-            is_running = False
-        elif key == ord('f'):  # Manual finish
-            if is_running:
-                tracker.update_score('finish')
-                is_running = False
+            return False
+        if key in (ord('s'), ord('r'), ord('d'), ord('f')):
+            if threaded:
+                commands.put(key)
+            else:
+                apply_command(key)
+        return True
+    
+    if threaded:
+        pipeline = FramePipeline(cap, process_frame, render_queue_size=PIPELINE_RENDER_QUEUE).start()
+        last_report = time.time()
+        while not pipeline.finished:
+            pkt = pipeline.get_packet(timeout=0.05)
+            if pkt is not None:
+                cv2.imshow("Bird's-Eye View - Obstacle Course", pkt.result)
+                cv2.imshow("Original Camera Feed", pkt.frame)
+            if not handle_key(cv2.waitKey(1) & 0xFF):
+                break
+            if pkt is not None:
+                pipeline.frame_displayed(pkt)
+            if time.time() - last_report >= 5.0:
+                print(pipeline.format_report())
+                last_report = time.time()
+        pipeline.stop()
+        print(pipeline.format_report())
+        if pipeline.error is not None:
+            print(f"❌ Pipeline stopped on error: {pipeline.error!r}")
+    else:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            
+            result = process_frame(frame)
+            
+            # Display
+            cv2.imshow("Bird's-Eye View - Obstacle Course", result)
+            cv2.imshow("Original Camera Feed", frame)
+            
+            # Handle keyboard input
+            if not handle_key(cv2.waitKey(1) & 0xFF):
+                break
     
     # Cleanup
     cap.release()
@@ -455,5 +702,9 @@ if __name__ == "__main__":
     # Run with webcam
     run_obstacle_course_tracker(video_source=2)
     
+    # Opt-in modes: cache path + obstacles after calibration, search for the robot near its predicted
+    # position, and run capture / processing / display on separate threads
+    # run_obstacle_course_tracker(video_source=2, static_scene=True, roi_tracking=True, threaded=True)
+    
     # Or run with video file:
     # run_obstacle_course_tracker(video_source='obstacle_course.mp4')
@@ -0,0 +1 @@
+# Vision package: robot tracking and collision helpers shared by video.py and track.py
@@ -0,0 +1,79 @@
+"""Obstacle distance field shared by video.py and track.py: O(1) "how far is the robot from the nearest obstacle"."""
+import cv2
+import numpy as np
+
+# Robot footprint within this many px of an obstacle counts as a touch
+COLLISION_MARGIN_PX = 20
+# Obstacles re-detected on a live frame move by a pixel or two from noise alone; a layout whose bounding
+# boxes all stay within this many px of the ones the field was built for keeps the current field
+LAYOUT_TOLERANCE_PX = 4
+
+
+class ObstacleDistanceField:
+    """
+    cv2.distanceTransform of the obstacle mask: each pixel holds the distance (px) to the nearest
+    obstacle pixel, 0 inside an obstacle. Built once per obstacle layout; every lookup is then an
+    array index, and a whole robot contour is checked with one vectorized gather.
+    Callers that re-detect obstacles every frame can call update() every frame: detection jitter within
+    tolerance_px does not trigger a rebuild (the field is then off by at most that much, well inside
+    the collision margin).
+    """
+
+    def __init__(self, tolerance_px=LAYOUT_TOLERANCE_PX):
+        self.field = None  # float32 H x W
+        self.tolerance_px = tolerance_px
+        self._shape = None
+        self._rects = None  # sorted bounding boxes (N x 4) the field was built for
+        self._mask = None
+        self.rebuilds = 0
+
+    def _same_layout(self, shape, rects):
+        if shape != self._shape or self._rects is None or len(rects) != len(self._rects):
+            return False
+        return len(rects) == 0 or int(np.abs(rects - self._rects).max()) <= self.tolerance_px
+
+    def update(self, obstacle_contours, frame_shape):
+        """Rebuild only if the obstacle layout changed: a different number of obstacles, or a bounding box
+        moved by more than tolerance_px. Returns True if rebuilt."""
+        h, w = frame_shape[:2]
+        rects = np.array(sorted(cv2.boundingRect(c) for c in obstacle_contours), np.int32).reshape(-1, 4)
+        if self._same_layout((h, w), rects):
+            return False
+        if self._mask is None or self._mask.shape != (h, w):
+            self._mask = np.empty((h, w), np.uint8)
+        # distanceTransform measures distance to the nearest zero pixel, so obstacles are 0 and free space 255
+        self._mask.fill(255)
+        if obstacle_contours:
+            cv2.drawContours(self._mask, list(obstacle_contours), -1, 0, -1)
+            self.field = cv2.distanceTransform(self._mask, cv2.DIST_L2, 5)
+        else:
+            self.field = None
+        self._shape, self._rects = (h, w), rects
+        self.rebuilds += 1
+        return True
+
+    def distance_at(self, point):
+        """Distance from one (x, y) point to the nearest obstacle; inf if there are no obstacles."""
+        if self.field is None:
+            return float("inf")
+        h, w = self.field.shape
+        x = min(max(int(point[0]), 0), w - 1)
+        y = min(max(int(point[1]), 0), h - 1)
+        return float(self.field[y, x])
+
+    def footprint_distance(self, robot_pos, robot_contour=None):
+        """Smallest obstacle distance over the robot's centroid and contour points."""
+        if self.field is None:
+            return float("inf")
+        if robot_contour is None or len(robot_contour) == 0:
+            return self.distance_at(robot_pos)
+        pts = robot_contour.reshape(-1, 2)
+        h, w = self.field.shape
+        xs = np.clip(pts[:, 0], 0, w - 1)
+        ys = np.clip(pts[:, 1], 0, h - 1)
+        return min(float(self.field[ys, xs].min()), self.distance_at(robot_pos))
+
+    def is_touching(self, robot_pos, robot_contour=None, margin=COLLISION_MARGIN_PX):
+        if robot_pos is None:
+            return False
+        return self.footprint_distance(robot_pos, robot_contour) <= margin
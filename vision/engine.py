@@ -0,0 +1,238 @@
+"""Headless vision engine: runs the track.py detectors on the shared /stream capture and writes
+obstacle touches and box-drop ratings straight into MatchState."""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import track
+from vision.collision import COLLISION_MARGIN_PX, ObstacleDistanceField
+from vision.robot_tracker import RobotTracker
+
+# check_if_non_white_in_inner_zone rating -> MatchState box drop key (0 = nothing in the zone)
+RATING_TO_BOX_DROP = {
+    5: "fully_in",
+    4: "edge_touching",
+    2: "less_than_half_out",
+    1: "mostly_out",
+}
+# A new drop needs this fraction of the drop zone to look different from when the last drop was recorded
+DROP_CHANGE_MIN = 0.1
+
+
+class VisionEngine:
+    """
+    Background thread that reads clean frames from a FrameBroadcaster's raw ring, so the camera is
+    decoded once for both /stream and scoring. Only scores while the match timer is running.
+
+      touches:   rising edge of "robot footprint within margin of an obstacle", debounced by touch_cooldown_sec
+      box drops: drop-zone contents (non-white pixels) that stay the same for drop_stable_frames samples
+                 while the robot is outside the zone, and differ from the contents when the last drop was
+                 recorded (another box landed, even with the same rating); at most two per match
+
+    Zone and obstacles are re-detected every scene_refresh_sec instead of every frame (the course is static).
+    on_event(kind, detail) is called from the engine thread after each state change ("obstacle_touch",
+    "box_drop").
+    """
+
+    def __init__(
+        self,
+        broadcaster,
+        state,
+        on_event=None,
+        process_fps=15.0,
+        scene_refresh_sec=2.0,
+        drop_stable_frames=8,
+        touch_cooldown_sec=1.0,
+        margin=COLLISION_MARGIN_PX,
+    ):
+        self.broadcaster = broadcaster
+        self.state = state
+        self.on_event = on_event
+        self.process_interval = 1.0 / process_fps if process_fps > 0 else 0.0
+        self.scene_refresh_sec = scene_refresh_sec
+        self.drop_stable_frames = max(1, drop_stable_frames)
+        self.touch_cooldown_sec = touch_cooldown_sec
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._field = ObstacleDistanceField()
+        self._tracker = RobotTracker()
+        self.frames_processed = 0
+        self.touches_recorded = 0
+        self.drops_recorded = 0
+        self.last_error = None
+        self._reset_scene()
+        self._reset_match(None)
+
+    def _reset_scene(self):
+        self._inner = None
+        self._outer = None
+        self._inner_mask = None  # bool H x W, True inside the inner drop zone
+        self._inner_area = 0
+        self._scene_at = 0.0
+
+    def _reset_match(self, started_at):
+        self._match_started_at = started_at
+        self._touching = False
+        self._last_touch_at = None
+        self._drop_occupancy = None  # zone contents when the last drop was recorded
+        self._candidate = None       # zone contents being checked for stability
+        self._candidate_count = 0
+        self._tracker.reset()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the engine thread (no-op if already running, or if a stopped thread has not exited yet).
+        Returns True if it was started."""
+        with self._lock:
+            if self.running:
+                if self._stop.is_set():
+                    print("[Vision] Previous engine thread is still stopping; not restarting")
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vision-engine", daemon=True)
+            self._thread.start()
+            print(f"[Vision] Engine started on source {self.broadcaster.source!r}")
+            return True
+
+    def stop(self, timeout=2.0):
+        """Stop the engine thread. Returns True if it was running. If it does not exit within timeout it is
+        left to finish its current frame, and start() refuses to launch a second one until it has."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return False
+            self._stop.set()
+        thread.join(timeout)
+        with self._lock:
+            if thread.is_alive():
+                print(f"[Vision] Engine thread did not stop within {timeout}s; it will exit after its current frame")
+                return True
+            if self._thread is thread:
+                self._thread = None
+        print("[Vision] Engine stopped")
+        return True
+
+    def _run(self):
+        ring = self.broadcaster.open_raw()
+        try:
+            seq = 0
+            next_due = 0.0
+            while not self._stop.is_set():
+                seq_new, frame = ring.wait_newer(seq, timeout=0.5)
+                if seq_new <= seq or frame is None:
+                    if ring.closed:
+                        print("[Vision] Video source ended")
+                        break
+                    continue
+                seq = seq_new
+                now = time.monotonic()
+                if now < next_due:
+                    continue
+                next_due = now + self.process_interval
+                try:
+                    self.process(frame, now)
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"[Vision] Error: {e}")
+        finally:
+            self.broadcaster.close_raw()
+
+    def process(self, frame, now=None):
+        """Score one BGR frame. Public so it can be driven directly (e.g. from a recorded video)."""
+        now = time.monotonic() if now is None else now
+        started_at = self.state.timer_started_at
+        if started_at is None:
+            return
+        if started_at != self._match_started_at:
+            self._reset_match(started_at)
+            self._scene_at = 0.0
+        self.frames_processed += 1
+
+        if self._inner is None or now - self._scene_at >= self.scene_refresh_sec:
+            inner, outer, blue_mask = track.detect_blue_drop_zone(frame)
+            _, _, _, obstacles = track.detect_red_track_and_obstacles(frame, blue_mask)
+            self._inner, self._outer = inner, outer
+            if inner is not None:
+                mask = np.zeros(frame.shape[:2], np.uint8)
+                cv2.drawContours(mask, [inner], -1, 1, -1)
+                self._inner_mask = mask.astype(bool)
+                self._inner_area = int(np.count_nonzero(mask))
+            self._field.update(obstacles, frame.shape)
+            self._scene_at = now
+
+        robot, contour, _ = self._tracker.update(frame.shape, lambda roi: track.detect_robot_blob(frame, roi))
+        self._check_touch(robot, contour, now)
+        self._check_drop(frame, robot)
+
+    def _check_touch(self, robot, contour, now):
+        touching = self._field.is_touching(robot, contour, self.margin)
+        if touching and not self._touching and (
+                self._last_touch_at is None or now - self._last_touch_at >= self.touch_cooldown_sec):
+            self._last_touch_at = now
+            count = self.state.record_obstacle_touch()
+            self.touches_recorded += 1
+            self._emit("obstacle_touch", {"obstacle_touches": count})
+        self._touching = touching
+
+    def _robot_in_zone(self, robot):
+        if robot is None or self._outer is None:
+            return False
+        return cv2.pointPolygonTest(self._outer, (float(robot[0]), float(robot[1])), False) >= 0
+
+    def _differs(self, a, b):
+        return np.count_nonzero(a ^ b) > DROP_CHANGE_MIN * max(1, self._inner_area)
+
+    def _check_drop(self, frame, robot):
+        if self._inner is None or self._robot_in_zone(robot):
+            # The robot itself would read as a box while it is over the zone
+            self._candidate_count = 0
+            return
+        # Same non-white test as track.check_if_non_white_in_inner_zone, kept per pixel
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        occupied = (gray > 10) & (gray < 240) & self._inner_mask
+        if self._candidate is None or self._differs(occupied, self._candidate):
+            self._candidate = occupied
+            self._candidate_count = 0
+        self._candidate_count += 1
+        if self._candidate_count != self.drop_stable_frames:
+            return
+        if self._drop_occupancy is not None and not self._differs(occupied, self._drop_occupancy):
+            return  # the boxes already recorded (e.g. the robot drove over the zone without dropping)
+        key = RATING_TO_BOX_DROP.get(track.check_if_non_white_in_inner_zone(frame, self._inner))
+        if key is None:
+            return
+        slot = self.state.record_box_drop(key)
+        self._drop_occupancy = occupied
+        if slot is not None:
+            self.drops_recorded += 1
+            self._emit("box_drop", {"slot": slot, "rating": key})
+
+    def _emit(self, kind, detail):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(kind, detail)
+        except Exception as e:
+            print(f"[Vision] on_event error: {e}")
+
+    def status(self):
+        return {
+            "running": self.running,
+            "stopping": self.running and self._stop.is_set(),
+            "source": self.broadcaster.source,
+            "match_active": self._match_started_at is not None and self.state.timer_started_at is not None,
+            "frames_processed": self.frames_processed,
+            "touches_recorded": self.touches_recorded,
+            "drops_recorded": self.drops_recorded,
+            "drop_zone_found": self._inner is not None,
+            "obstacle_field_rebuilds": self._field.rebuilds,
+            "robot_full_searches": self._tracker.full_searches,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,197 @@
+"""Threaded capture -> process -> render pipeline for the trackers, with per-stage and capture-to-display latency."""
+import queue
+import threading
+import time
+from collections import deque
+
+_DONE = object()  # end-of-stream marker on the render queue
+
+
+class Packet:
+    """One camera frame moving through the pipeline."""
+
+    __slots__ = ("frame_id", "frame", "captured_at", "processed_at", "result")
+
+    def __init__(self, frame_id, frame, captured_at):
+        self.frame_id = frame_id
+        self.frame = frame
+        self.captured_at = captured_at
+        self.processed_at = None
+        self.result = None
+
+
+class LatestFrame:
+    """Single-slot handoff: put() replaces whatever is waiting, so the consumer always gets the freshest frame."""
+
+    def __init__(self):
+        self._item = None
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None, timeout)
+            item, self._item = self._item, None
+            return item
+
+
+class StageStats:
+    """Rolling latency window (ms) for one stage."""
+
+    def __init__(self, window=120):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, ms):
+        self._samples.append(ms)
+        self.count += 1
+
+    def summary(self):
+        if not self._samples:
+            return {"mean_ms": 0.0, "p95_ms": 0.0, "count": self.count}
+        s = sorted(self._samples)
+        return {
+            "mean_ms": round(sum(s) / len(s), 2),
+            "p95_ms": round(s[min(len(s) - 1, int(len(s) * 0.95))], 2),
+            "count": self.count,
+        }
+
+
+class FramePipeline:
+    """
+    capture thread -> LatestFrame -> process thread -> bounded queue -> render (caller's thread).
+
+    A slow stage never stalls cap.read(): the capture thread keeps reading and only the newest frame
+    waits for processing; stale frames are dropped and counted. Rendering stays on the caller's thread
+    because cv2.imshow / waitKey must run there.
+
+    process(frame) runs on the worker thread and its return value becomes packet.result. If it returns
+    a reused buffer, keep at least render_queue_size + 2 of them in rotation so the frame being shown
+    is never overwritten.
+
+    If cap.read() or process() raises, the stage ends the stream (finished becomes True) and the
+    exception is kept in error, so the display loop exits instead of waiting forever.
+
+    Latency: capture = cap.read(), process = process(), render = processed -> frame_displayed()
+    (queue wait + drawing), end_to_end = cap.read() returning -> frame_displayed(). The camera's own
+    exposure/transfer delay is not visible from here, so end_to_end is a lower bound on glass-to-glass.
+    """
+
+    def __init__(self, cap, process, render_queue_size=2):
+        self.cap = cap
+        self.process = process
+        self._latest = LatestFrame()
+        self._out = queue.Queue(maxsize=render_queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+        self.render_dropped = 0
+        self.finished = False  # set once the render stage has seen the end of the stream
+        self.error = None  # exception that ended the capture or process stage
+        self.stats = {name: StageStats() for name in ("capture", "process", "render", "end_to_end")}
+
+    def start(self):
+        for target, name in ((self._capture_loop, "pipeline-capture"), (self._process_loop, "pipeline-process")):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._latest.put(_DONE)
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    def _fail(self, stage, e):
+        if self.error is None:
+            self.error = e
+        print(f"[Pipeline] {stage} stage stopped: {e!r}")
+
+    def _capture_loop(self):
+        frame_id = 0
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                ret, frame = self.cap.read()
+                t1 = time.perf_counter()
+                if not ret:
+                    break
+                self.stats["capture"].add((t1 - t0) * 1000)
+                frame_id += 1
+                self._latest.put(Packet(frame_id, frame, t1))
+        except Exception as e:
+            self._fail("capture", e)
+        finally:
+            self._latest.put(_DONE)
+
+    def _process_loop(self):
+        try:
+            while True:
+                pkt = self._latest.get(timeout=0.5)
+                if pkt is None:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if pkt is _DONE:
+                    break
+                t0 = time.perf_counter()
+                pkt.result = self.process(pkt.frame)
+                pkt.processed_at = time.perf_counter()
+                self.stats["process"].add((pkt.processed_at - t0) * 1000)
+                self._put_render(pkt)
+        except Exception as e:
+            self._fail("process", e)
+        finally:
+            self._put_render(_DONE)
+
+    def _put_render(self, item):
+        """Bounded queue that drops its oldest entry instead of blocking the worker."""
+        while True:
+            try:
+                self._out.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._out.get_nowait()
+                    self.render_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get_packet(self, timeout=1.0):
+        """Next processed packet for the render stage; None on timeout or at end of stream (see finished)."""
+        try:
+            item = self._out.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is _DONE:
+            self.finished = True
+            return None
+        return item
+
+    def frame_displayed(self, pkt):
+        """Call right after the packet was shown."""
+        now = time.perf_counter()
+        self.stats["render"].add((now - pkt.processed_at) * 1000)
+        self.stats["end_to_end"].add((now - pkt.captured_at) * 1000)
+
+    def report(self):
+        out = {name: s.summary() for name, s in self.stats.items()}
+        out["dropped_before_process"] = self._latest.dropped
+        out["dropped_before_render"] = self.render_dropped
+        return out
+
+    def format_report(self):
+        r = self.report()
+        stages = "  ".join(
+            f"{name} {r[name]['mean_ms']:.1f}/{r[name]['p95_ms']:.1f}ms"
+            for name in ("capture", "process", "render", "end_to_end")
+        )
+        return (f"[Pipeline] mean/p95  {stages}  dropped: {r['dropped_before_process']} stale, "
+                f"{r['dropped_before_render']} unrendered")
@@ -0,0 +1,129 @@
+"""ROI-restricted robot tracking: search a window around the predicted position; full frame only after losing the robot."""
+import math
+from collections import deque
+
+import cv2
+import numpy as np
+
+PREDICTORS = ("none", "velocity", "kalman")
+
+
+class RobotTracker:
+    """
+    Wraps a robot detector so each frame only a window around where the robot should be is searched.
+    Besides cutting pixel work, this stops the track jumping to a bright object elsewhere on the board.
+
+    detect(roi) must return (pos, contour, area) in full-frame coordinates, or (None, None, 0);
+    roi is (x0, y0, x1, y1) or None for the whole frame.
+
+    predictor:
+      "none"     - window centred on the last position
+      "velocity" - constant velocity from the last positions
+      "kalman"   - constant-velocity cv2.KalmanFilter (smoother under jitter)
+    The window radius is base_radius + velocity_gain * speed (px/frame), grows with each missed frame,
+    and after lost_frames misses in a row the tracker falls back to a full-frame search.
+    """
+
+    def __init__(self, predictor="velocity", base_radius=80, velocity_gain=3.0, max_radius=400, lost_frames=5):
+        if predictor not in PREDICTORS:
+            raise ValueError(f"predictor must be one of {PREDICTORS}")
+        self.predictor = predictor
+        self.base_radius = base_radius
+        self.velocity_gain = velocity_gain
+        self.max_radius = max_radius
+        self.lost_frames = lost_frames
+        self._history = deque(maxlen=5)  # recent detections (x, y)
+        self._kalman = None
+        self.misses = 0
+        self.last_roi = None
+        self.roi_fraction = 1.0  # share of the frame searched on the last update
+        self.full_searches = 0
+
+    def reset(self):
+        self._history.clear()
+        self._kalman = None
+        self.misses = 0
+        self.last_roi = None
+        self.roi_fraction = 1.0
+
+    def _velocity(self):
+        if self.predictor == "kalman" and self._kalman is not None:
+            s = self._kalman.statePost
+            return float(s[2, 0]), float(s[3, 0])
+        if len(self._history) < 2:
+            return 0.0, 0.0
+        (x0, y0), (x1, y1) = self._history[-2], self._history[-1]
+        return float(x1 - x0), float(y1 - y0)
+
+    def _predict(self):
+        """Expected robot position this frame, or None if there is nothing to go on."""
+        if not self._history:
+            return None
+        if self.predictor == "kalman" and self._kalman is not None:
+            p = self._kalman.predict()
+            return float(p[0, 0]), float(p[1, 0])
+        x, y = self._history[-1]
+        if self.predictor == "velocity":
+            vx, vy = self._velocity()
+            steps = 1 + self.misses  # coast through missed frames
+            return x + vx * steps, y + vy * steps
+        return float(x), float(y)
+
+    def search_window(self, frame_shape):
+        """(x0, y0, x1, y1) to search this frame, or None for the full frame."""
+        if self.misses >= self.lost_frames:
+            return None
+        center = self._predict()
+        if center is None:
+            return None
+        vx, vy = self._velocity()
+        radius = (self.base_radius + self.velocity_gain * math.hypot(vx, vy)) * (1 + self.misses)
+        radius = int(min(radius, self.max_radius))
+        h, w = frame_shape[:2]
+        cx, cy = int(center[0]), int(center[1])
+        x0, y0 = max(0, cx - radius), max(0, cy - radius)
+        x1, y1 = min(w, cx + radius), min(h, cy + radius)
+        if x1 - x0 < 8 or y1 - y0 < 8:  # prediction ran off the frame
+            return None
+        return x0, y0, x1, y1
+
+    def _observe(self, pos):
+        self._history.append(pos)
+        if self.predictor != "kalman":
+            return
+        if self._kalman is None:
+            k = cv2.KalmanFilter(4, 2)
+            k.transitionMatrix = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 1, 0], [0, 0, 0, 1]], np.float32)
+            k.measurementMatrix = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], np.float32)
+            k.processNoiseCov = np.eye(4, dtype=np.float32) * 1e-2
+            k.measurementNoiseCov = np.eye(2, dtype=np.float32) * 1e-1
+            k.errorCovPost = np.eye(4, dtype=np.float32)
+            k.statePost = np.array([[pos[0]], [pos[1]], [0], [0]], np.float32)
+            self._kalman = k
+        else:
+            self._kalman.correct(np.array([[pos[0]], [pos[1]]], np.float32))
+
+    def update(self, frame_shape, detect):
+        """Run detect on this frame's search window. Returns detect's (pos, contour, area)."""
+        roi = self.search_window(frame_shape)
+        if roi is None:
+            self.full_searches += 1
+        pos, contour, area = detect(roi)
+        if pos is None and roi is not None and self.misses + 1 >= self.lost_frames:
+            # Lost for K frames: fall back to the full frame right away
+            roi = None
+            self.full_searches += 1
+            pos, contour, area = detect(None)
+        h, w = frame_shape[:2]
+        self.last_roi = roi
+        self.roi_fraction = 1.0 if roi is None else (roi[2] - roi[0]) * (roi[3] - roi[1]) / float(w * h)
+        if pos is None:
+            self.misses += 1
+            return None, None, 0
+        if roi is None:
+            # Fresh (re)acquisition: do not blend with the track we lost
+            self._history.clear()
+            self._kalman = None
+        self.misses = 0
+        self._observe(pos)
+        return pos, contour, area
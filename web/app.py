@@ -1,29 +1,64 @@
 """FastAPI app: state API, stream+HUD. Timer is controlled by webpage buttons only."""
+import asyncio
 import sys
 import threading
-import cv2
+import time
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from config.settings import Settings
-from state.store import match_state
+from state.leaderboard import LeaderboardIndex, parse_cursor
+from state.store import Arena, arenas
+from db import async_mongodb as adb
 from db import mongodb as db_mongodb
+from db.leaderboard_cache import LeaderboardCache
+from db.local_store import LocalRunStore, new_run_id
+from db.sync import AtlasSyncer
+from web.stream import MJPEG_MEDIA_TYPE, get_broadcaster, make_tier
+from web.state_stream import SSE_HEADERS, SSE_MEDIA_TYPE, get_state_hub, sse_event, state_etag
+
+# Per arena (see Settings.ARENAS): arena.commentary is set in lifespan if Gemini + ElevenLabs keys are present;
+# arena.vision is created on first /api/vision/start (or at startup with VISION_AUTOSTART)
+
+# Every saved run is written to the local store first. With MongoDB, the syncer uploads it and leaderboard
+# reads are served from the in-process mirror. All three are created in lifespan, so importing the app
+# opens no files
+run_store: LocalRunStore | None = None
+atlas_sync: AtlasSyncer | None = None
+leaderboard_cache: LeaderboardCache | None = None
+
+
+def _open_run_store() -> None:
+    global run_store, atlas_sync, leaderboard_cache
+    run_store = LocalRunStore(Settings.LOCAL_STORE_PATH)
+    atlas_sync = AtlasSyncer(
+        run_store,
+        batch_size=Settings.MONGODB_WRITE_BATCH,
+        interval_sec=Settings.MONGODB_WRITE_INTERVAL_SEC,
+    )
+    leaderboard_cache = LeaderboardCache(Settings.LEADERBOARD_CACHE_TTL_SEC, store=run_store)
+
 
-# Commentary runner: set in lifespan if Gemini + ElevenLabs keys present
-commentary_runner = None
+def get_arena(arena: str | None = None) -> Arena:
+    """?arena=<id> scopes a request to one track; omitted = the default arena."""
+    found = arenas.get(arena)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Unknown arena {arena!r}; known: {arenas.ids()}")
+    return found
 
 
-def build_commentary_payload() -> dict:
+def build_commentary_payload(arena: Arena) -> dict:
     """Build one Gemini-shaped payload from current match state (team_id, score_total, t_elapsed_s, score_breakdown, box_drop_1, box_drop_2, obstacle_touches, match_ended, notable_event)."""
-    state = match_state.get_state()
+    state = arena.state.get_state()
     return {
         "team_id": state.get("team_number", ""),
         "score_total": state.get("score_total", 0),
@@ -37,39 +72,108 @@ def build_commentary_payload() -> dict:
     }
 
 
+# Sync routes run on Starlette's threadpool: without this, two concurrent first requests could each build an
+# engine (two capture threads on one camera)
+_vision_lock = threading.Lock()
+
+
+def _get_vision_engine(arena: Arena):
+    with _vision_lock:
+        if arena.vision is None:
+            from vision.engine import VisionEngine
+
+            def on_event(kind: str, detail: dict) -> None:
+                """Vision engine changed the score: let the commentator react without waiting for a button push."""
+                if arena.commentary is not None:
+                    arena.commentary.push(build_commentary_payload(arena))
+
+            arena.vision = VisionEngine(
+                get_broadcaster(arena.video_source),
+                arena.state,
+                on_event=on_event,
+                process_fps=Settings.VISION_PROCESS_FPS,
+                scene_refresh_sec=Settings.VISION_SCENE_REFRESH_SEC,
+                drop_stable_frames=Settings.VISION_DROP_STABLE_FRAMES,
+            )
+        return arena.vision
+
+
+def _warm_tts_cache(tts, lines: list[str]) -> None:
+    t0 = time.perf_counter()
+    rendered = tts.warm(lines)
+    print(f"[Commentary] TTS cache warm: {rendered} of {len(lines)} lines rendered "
+          f"in {time.perf_counter() - t0:.1f}s ({tts.cache.stats()['entries']} cached)")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global commentary_runner
-    match_state.set_team_number(Settings.TEAM_NUMBER)
-    # Start commentary runner if Gemini + ElevenLabs keys are set
+    _open_run_store()
+    for arena in arenas.all():
+        arena.state.set_team_number(Settings.TEAM_NUMBER)
+    # Start one commentary runner per arena if Gemini + ElevenLabs keys are set
     if Settings.GEMINI_API_KEY and Settings.ELEVENLABS_API_KEY:
         try:
             from commentary.commentary_ai import CommentaryAI
             from commentary.commentary_runner import CommentaryRunner
+            from commentary.templates import warmup_lines
             from commentary.tts import TTSSpeaker
-            ai = CommentaryAI(Settings.GEMINI_API_KEY, Settings.GEMINI_MODEL)
-            tts = TTSSpeaker(Settings.ELEVENLABS_API_KEY, Settings.ELEVENLABS_VOICE)
-            commentary_runner = CommentaryRunner(
-                ai, tts,
-                filler_interval_sec=Settings.FILLER_INTERVAL_SEC,
-                max_payloads_per_call=Settings.MAX_PAYLOADS_PER_CALL,
-            )
-            threading.Thread(target=commentary_runner.run_loop, kwargs={"poll_interval": 0.5}, daemon=True).start()
-            print("[Commentary] Runner started (Gemini + ElevenLabs).")
+            from commentary.tts_cache import PcmCache
+            tts_cache = None
+            if Settings.TTS_CACHE_MAX_MB > 0:
+                tts_cache = PcmCache(Settings.TTS_CACHE_DIR, int(Settings.TTS_CACHE_MAX_MB * 1024 * 1024))
+            for arena in arenas.all():
+                ai = CommentaryAI(Settings.GEMINI_API_KEY, Settings.GEMINI_MODEL)
+                tts = TTSSpeaker(Settings.ELEVENLABS_API_KEY, Settings.ELEVENLABS_VOICE, cache=tts_cache)
+                arena.commentary = CommentaryRunner(
+                    ai, tts,
+                    filler_interval_sec=Settings.FILLER_INTERVAL_SEC,
+                    max_payloads_per_call=Settings.MAX_PAYLOADS_PER_CALL,
+                    llm_budget_sec=Settings.COMMENTARY_LLM_BUDGET_SEC,
+                    stale_after_sec=Settings.COMMENTARY_STALE_SEC,
+                )
+                threading.Thread(
+                    target=arena.commentary.run_loop, kwargs={"poll_interval": 0.5},
+                    name=f"commentary-{arena.arena_id}", daemon=True,
+                ).start()
+            print(f"[Commentary] Runner started (Gemini + ElevenLabs) for arenas {arenas.ids()}.")
+            if tts_cache is not None and Settings.TTS_CACHE_WARMUP:
+                # Every arena uses the same voice, so one speaker renders the lines for all of them
+                threading.Thread(target=_warm_tts_cache, args=(tts, warmup_lines()), name="tts-warmup",
+                                 daemon=True).start()
         except Exception as e:
             print(f"[Commentary] Runner not started: {e}")
-            commentary_runner = None
-    else:
-        commentary_runner = None
+            for arena in arenas.all():
+                arena.commentary = None
     if not Settings.MONGODB_URI:
-        print("[MongoDB] MONGODB_URI not set; Save run and leaderboard use in-memory storage.")
+        runs = await asyncio.to_thread(run_store.all_runs)
+        for run in runs:
+            arenas.leaderboard.add(run)
+        print(f"[MongoDB] MONGODB_URI not set; leaderboard uses the local store ({len(runs)} runs in {run_store.path}).")
     else:
-        ok, err = db_mongodb.check_connection()
+        atlas_sync.start()
+        ok, err = await adb.check_connection()
         if ok:
-            print("[MongoDB] Connected and ready.")
+            print(f"[MongoDB] Connected and ready; indexes: {', '.join(await adb.ensure_indexes())}")
         else:
-            print(f"[MongoDB] Not connected: {err}; Save run and leaderboard will fail for DB.")
+            print(f"[MongoDB] Not connected: {err}; saved runs are kept in the local store and synced once it is back.")
+        if Settings.LEADERBOARD_CACHE_TTL_SEC > 0:
+            await asyncio.to_thread(leaderboard_cache.refresh)
+            print(f"[MongoDB] Leaderboard cache loaded: {leaderboard_cache.stats()['runs']} runs")
+            if Settings.LEADERBOARD_CHANGE_STREAM:
+                leaderboard_cache.start_watch(on_change=_publish_leaderboard_saved)
+    if Settings.VISION_AUTOSTART:
+        for arena in arenas.all():
+            _get_vision_engine(arena).start()
     yield
+    leaderboard_cache.stop_watch()
+    if Settings.MONGODB_URI:
+        await asyncio.to_thread(atlas_sync.stop)
+    run_store.close()
+    for arena in arenas.all():
+        if arena.commentary is not None:
+            arena.commentary.stop()
+        if arena.vision is not None:
+            arena.vision.stop()
 
 
 app = FastAPI(title="UTRA Match Overlay", lifespan=lifespan)
@@ -81,6 +185,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
@@ -91,19 +196,94 @@ def health():
 
 
 @app.get("/api/health/db")
-def health_db():
-    """Check MongoDB connection. Returns ok=True if connected, ok=False and error message otherwise."""
+async def health_db(explain: bool = False):
+    """Check MongoDB connection. Returns ok=True if connected, ok=False and error message otherwise.
+    sync shows the upload backlog from the local store; explain=true adds the leaderboard query plan (it should use the
+    leaderboard index: no COLLSCAN, no SORT) and checks that cursor pages 1 and 2 are contiguous."""
     if not Settings.MONGODB_URI:
-        return {"ok": False, "error": "MONGODB_URI not set", "storage": "in_memory"}
-    ok, err = db_mongodb.check_connection()
-    if ok:
-        return {"ok": True, "storage": "mongodb"}
-    return {"ok": False, "error": err or "Connection failed", "storage": "mongodb"}
+        return {"ok": False, "error": "MONGODB_URI not set", "storage": "local", "local": run_store.counts()}
+    ok, err = await adb.check_connection()
+    out = {"ok": ok, "storage": "mongodb", "sync": atlas_sync.stats()}
+    if Settings.LEADERBOARD_CACHE_TTL_SEC > 0:
+        out["cache"] = leaderboard_cache.stats()
+    if not ok:
+        return {**out, "error": err or "Connection failed"}
+    out["indexes"] = await adb.ensure_indexes()
+    if explain:
+        out["leaderboard_plan"] = await adb.explain_leaderboard()
+        out["leaderboard_paging"] = await adb.check_paging()
+    return out
+
+
+@app.get("/api/arenas")
+def list_arenas():
+    """Arena IDs served by this process (pass one as ?arena= to any match endpoint)."""
+    return {"default": arenas.default_id, "arenas": [
+        {"arena": a.arena_id, "video_source": a.video_source} for a in arenas.all()
+    ]}
 
 
 @app.get("/api/state")
-def get_state():
-    return match_state.get_state()
+def get_state(request: Request, arena: Arena = Depends(get_arena)):
+    """Current match state. Send If-None-Match with the last ETag to get a bodyless 304 when nothing changed."""
+    etag = state_etag(arena.state)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(arena.state.get_state(), headers=headers)
+
+
+@app.get("/api/state/stream")
+async def state_stream(arena: Arena = Depends(get_arena)):
+    """Server-Sent Events: a "snapshot" event, then a "diff" event (changed keys + version) per state change,
+    and "leaderboard" when a run is saved. Replaces polling /api/state."""
+    return StreamingResponse(get_state_hub(arena.state).events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+def _match_log(arena: Arena, match_id: str):
+    log = arena.state.event_log.get(None if match_id == "current" else match_id)
+    if log is None:
+        raise HTTPException(status_code=404, detail=f"Unknown match {match_id!r}")
+    return log
+
+
+@app.get("/api/matches")
+def list_matches(arena: Arena = Depends(get_arena)):
+    """Matches kept in the arena's event log, oldest first; the last one is the current match."""
+    return [log.summary() for log in arena.state.event_log.matches()]
+
+
+@app.get("/api/matches/{match_id}/events")
+def match_events(match_id: str, arena: Arena = Depends(get_arena)):
+    """Every event of a match ("current" = the running one) with the state right after it."""
+    log = _match_log(arena, match_id)
+    return {"match_id": log.match_id, "timeline": arena.state.timeline(log.match_id)}
+
+
+@app.get("/api/matches/{match_id}/state")
+def match_state_at(match_id: str, t: float, arena: Arena = Depends(get_arena)):
+    """State as of t seconds on the match clock (0 = timer start; before the first start, the match's first event)."""
+    log = _match_log(arena, match_id)
+    return arena.state.state_at(log.clock_origin() + t, log.match_id)
+
+
+@app.get("/api/matches/{match_id}/replay")
+async def match_replay(match_id: str, speed: float = 1.0, arena: Arena = Depends(get_arena)):
+    """Server-Sent Events re-playing a match: one "event" (event + resulting state) per logged event, spaced
+    by the original gaps divided by speed (speed <= 0 sends them all at once), then "end"."""
+    log = _match_log(arena, match_id)
+    timeline = arena.state.timeline(log.match_id)
+
+    async def events():
+        prev_t = None
+        for entry in timeline:
+            if prev_t is not None and speed > 0:
+                await asyncio.sleep(min(entry["t"] - prev_t, 3600.0) / speed)
+            prev_t = entry["t"]
+            yield sse_event("event", entry, entry["seq"])
+        yield sse_event("end", {"match_id": log.match_id, "events": len(timeline)})
+
+    return StreamingResponse(events(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
 
 
 class SetTeamBody(BaseModel):
@@ -112,43 +292,99 @@ class SetTeamBody(BaseModel):
 
 
 @app.post("/api/timer/start")
-def start_timer():
+def start_timer(arena: Arena = Depends(get_arena)):
     """Start the match timer (call from page or key press)."""
-    match_state.set_timer_started()
-    if commentary_runner is not None:
-        commentary_runner.play_intro()
-    return match_state.get_state()
+    arena.state.set_timer_started()
+    if arena.commentary is not None:
+        arena.commentary.play_intro()
+    return arena.state.get_state()
 
 
 @app.post("/api/timer/stop")
-def stop_timer():
+def stop_timer(arena: Arena = Depends(get_arena)):
     """End the match: freeze timer at current value, set match_ended."""
-    match_state.set_timer_stopped()
-    return match_state.get_state()
+    arena.state.set_timer_stopped()
+    if arena.commentary is not None:
+        arena.commentary.match_stopped()
+    return arena.state.get_state()
 
 
 @app.post("/api/timer/reset")
-def reset_timer():
+def reset_timer(arena: Arena = Depends(get_arena)):
     """Start new match: clear frozen time and match_ended so timer can start from 0."""
-    match_state.reset_for_new_match()
-    if commentary_runner is not None:
-        commentary_runner.reset_for_new_match()
-    return match_state.get_state()
+    arena.state.reset_for_new_match()
+    if arena.commentary is not None:
+        arena.commentary.reset_for_new_match()
+    return arena.state.get_state()
 
 
 @app.post("/api/set_team")
-def set_team(body: SetTeamBody):
+def set_team(body: SetTeamBody, arena: Arena = Depends(get_arena)):
     num = body.team_number if body.team_number is not None else body.team
     if num is not None:
-        match_state.set_team_number(num)
-    return match_state.get_state()
+        arena.state.set_team_number(num)
+    return arena.state.get_state()
+
+
+def _leaderboard_index() -> LeaderboardIndex | None:
+    """Where leaderboard reads come from: the in-memory index, the MongoDB cache, or None to query MongoDB
+    directly (LEADERBOARD_CACHE_TTL_SEC=0)."""
+    if not Settings.MONGODB_URI:
+        return arenas.leaderboard
+    if Settings.LEADERBOARD_CACHE_TTL_SEC > 0:
+        return leaderboard_cache.index()
+    return None
 
 
 @app.get("/api/leaderboard")
-def get_leaderboard():
-    if Settings.MONGODB_URI:
-        return db_mongodb.get_leaderboard()
-    return match_state.get_leaderboard()
+async def get_leaderboard(offset: int = 0, limit: int | None = None, after: str | None = None):
+    """One leaderboard across all arenas; each run records its arena.
+    Cursor paging: the X-Next-Cursor header holds the after= value for the next page (absent on the last
+    page); pass after= (empty) with limit to start. offset / limit also work when served from memory,
+    where the sorted JSON is cached until the next saved run. Direct MongoDB pages default to 100 runs."""
+    index = _leaderboard_index()
+    headers: dict[str, str] = {}
+    try:
+        if index is None:
+            rows, next_cursor = await adb.get_leaderboard_page(
+                limit or 100, parse_cursor(after) if after else None
+            )
+        elif after is not None:
+            rows, next_cursor = index.page_after(after, limit or 100)
+        else:
+            next_cursor = index.cursor_at(offset + limit - 1) if limit else None
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            return Response(index.page_json(offset, limit), media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad cursor: {e}")
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return JSONResponse(jsonable_encoder(rows), headers=headers)
+
+
+@app.get("/api/leaderboard/teams")
+async def get_team_leaderboard(offset: int = 0, limit: int | None = None):
+    """Best run per team with attempts and avg_t_elapsed_s (ties: faster time, then fewer obstacle touches)."""
+    index = _leaderboard_index()
+    if index is None:
+        rows = await adb.get_team_leaderboard()
+        return rows[max(0, offset):] if limit is None else rows[max(0, offset):max(0, offset) + max(0, limit)]
+    return Response(index.page_json(offset, limit, per_team=True), media_type="application/json")
+
+
+@app.get("/api/leaderboard/rank")
+def get_team_rank(team: str):
+    """Team's place on the best-run-per-team board ("of" counts teams), with its best run, attempts and
+    avg_t_elapsed_s (needs the in-memory leaderboard or the MongoDB cache)."""
+    index = _leaderboard_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Team rank needs the leaderboard cache (LEADERBOARD_CACHE_TTL_SEC > 0)")
+    found = index.team_rank(team)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"No runs for team {team!r}")
+    rank, teams, row = found
+    return {"team_number": team, "rank": rank, "of": teams, "run": row}
 
 
 class SetBreakdownBody(BaseModel):
@@ -160,102 +396,102 @@ class SetBreakdownBody(BaseModel):
 
 
 @app.post("/api/test/set_breakdown")
-def set_breakdown(body: SetBreakdownBody):
-    match_state.set_breakdown(
+def set_breakdown(body: SetBreakdownBody, arena: Arena = Depends(get_arena)):
+    arena.state.set_breakdown(
         obstacle_touches=body.obstacle_touches,
         completed_under_60=body.completed_under_60,
         box_drop_1=body.box_drop_1 if body.box_drop_1 is not None else body.box_drop,
         box_drop_2=body.box_drop_2,
     )
-    return match_state.get_state()
+    return arena.state.get_state()
 
 
-def _leaderboard_doc_from_state():
-    """Build one document for MongoDB from current match state (leaderboard shape)."""
-    s = match_state.get_state()
-    return {
-        "team_number": s["team_number"],
-        "team_display": s["team_display"],
-        "score_total": s["score_total"],
-        "t_elapsed_s": s["t_elapsed_s"],
-        "obstacle_touches": s["obstacle_touches"],
-        "completed_under_60": s["completed_under_60"],
-        "box_drop_1": s.get("box_drop_1"),
-        "box_drop_2": s.get("box_drop_2"),
-        "score_breakdown": s["score_breakdown"],
-    }
+def _publish_leaderboard_saved() -> None:
+    """Every arena's screens show the shared leaderboard, so tell all of them."""
+    for a in arenas.all():
+        get_state_hub(a.state).publish_event("leaderboard")
 
 
 @app.post("/api/test/save_run")
-def save_run():
+def save_run(arena: Arena = Depends(get_arena), idempotency_key: str | None = Header(None)):
+    """Save the current run. It is committed to the local store (SQLite) before this returns; with MongoDB
+    the syncer uploads it in the background and the cache shows it right away. A retried request with the
+    same Idempotency-Key header returns the first save instead of adding the run again."""
+    run, created = run_store.insert(arena.state.run_entry(), new_run_id(idempotency_key))
     if Settings.MONGODB_URI:
-        doc = _leaderboard_doc_from_state()
-        inserted = db_mongodb.insert_match(doc)
-        if inserted is not None:
-            saved = {k: v for k, v in inserted.items() if k != "_id"}
-            return {"saved": saved, "leaderboard": db_mongodb.get_leaderboard()}
-        return {"saved": None, "leaderboard": db_mongodb.get_leaderboard()}
-    entry = match_state.save_run_to_leaderboard()
-    return {"saved": entry, "leaderboard": match_state.get_leaderboard()}
+        if created:
+            atlas_sync.notify()
+        if Settings.LEADERBOARD_CACHE_TTL_SEC > 0:
+            leaderboard_cache.add(run)
+            leaderboard = leaderboard_cache.index().all()
+        else:
+            leaderboard = db_mongodb.get_leaderboard()  # not cached: the new run shows once it is synced
+    else:
+        if created:
+            arenas.leaderboard.add(run)
+        leaderboard = arenas.leaderboard.all()
+    if created:
+        _publish_leaderboard_saved()
+    return {"saved": run, "created": created, "leaderboard": leaderboard}
 
 
 @app.post("/api/commentary/push")
-def commentary_push():
-    """Push current match state as one payload to commentary runner (for Gemini + TTS)."""
-    payload = build_commentary_payload()
-    if commentary_runner is not None:
-        commentary_runner.push(payload)
+def commentary_push(arena: Arena = Depends(get_arena)):
+    """Push current match state as one payload to the arena's commentary runner (for Gemini + TTS)."""
+    payload = build_commentary_payload(arena)
+    if arena.commentary is not None:
+        arena.commentary.push(payload)
         return {"pushed": True}
     return {"pushed": False}
 
 
-def _stream_generator():
-    """Read camera, draw HUD (Team x, score, timer), yield MJPEG."""
-    cap = None
-    try:
-        cap = cv2.VideoCapture(Settings.VIDEO_SOURCE)
-        if not cap.isOpened():
-            yield b""
-            return
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            state = match_state.get_state()
-            t_elapsed = state["t_elapsed_s"]
-            m = int(t_elapsed // 60)
-            s = int(t_elapsed % 60)
-            time_str = f"{m:02d}:{s:02d}"
-            team_display = state["team_display"]
-            score = state["score_total"]
-            # Draw HUD
-            cv2.putText(
-                frame, f"{team_display}", (10, 35),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 2
-            )
-            cv2.putText(
-                frame, f"Score: {score}", (10, 75),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2
-            )
-            cv2.putText(
-                frame, f"Time: {time_str}", (10, 115),
-                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2
-            )
-            _, jpeg = cv2.imencode(".jpg", frame)
-            yield (b"--frame\r\n"
-                   b"Content-Type: image/jpeg\r\n\r\n" + jpeg.tobytes() + b"\r\n")
-    except Exception as e:
-        print(f"[Stream] Error: {e}")
-    finally:
-        if cap is not None:
-            cap.release()
+@app.get("/api/commentary/stats")
+def commentary_stats(arena: Arena = Depends(get_arena)):
+    """Commentary runner metrics for the arena: time to first audio (from generation start and from the
+    triggering payload), Gemini time to first sentence, and queue state."""
+    if arena.commentary is None:
+        return {"arena": arena.arena_id, "enabled": False}
+    return {"arena": arena.arena_id, "enabled": True, **arena.commentary.stats()}
+
+
+@app.post("/api/vision/start")
+def vision_start(arena: Arena = Depends(get_arena)):
+    """Start the headless tracker on the arena's shared /stream capture; it scores touches and box drops while the timer runs."""
+    engine = _get_vision_engine(arena)
+    engine.start()
+    return engine.status()
+
+
+@app.post("/api/vision/stop")
+def vision_stop(arena: Arena = Depends(get_arena)):
+    if arena.vision is None:
+        return {"running": False}
+    arena.vision.stop()
+    return arena.vision.status()
+
+
+@app.get("/api/vision/status")
+def vision_status(arena: Arena = Depends(get_arena)):
+    if arena.vision is None:
+        return {"running": False}
+    return arena.vision.status()
 
 
 @app.get("/stream")
-def stream():
+async def stream(
+    width: int = 0,
+    quality: int | None = None,
+    fps: float | None = None,
+    arena: Arena = Depends(get_arena),
+):
+    """MJPEG with HUD. All viewers share one capture + encode worker per video source; each viewer is
+    an async generator on the event loop, so streams never hold request-pool threads.
+    width / quality / fps pick an encode tier (e.g. /stream?width=640&quality=60&fps=10 for a judge
+    laptop); every distinct tier is encoded once per frame and shared by its viewers.
+    ?arena= picks the track: its camera and its HUD."""
     return StreamingResponse(
-        _stream_generator(),
-        media_type="multipart/x-mixed-replace; boundary=frame",
+        get_broadcaster(arena.video_source).aframes(make_tier(width, quality, fps), arena.state),
+        media_type=MJPEG_MEDIA_TYPE,
     )
 
 
@@ -0,0 +1,77 @@
+"""Pre-rendered HUD layer for /stream. The sprite is rebuilt only when team, score or the displayed second changes."""
+import time
+
+import cv2
+import numpy as np
+
+from state.store import MatchState, StateSnapshot, match_state
+
+# (text template key, origin, font scale, BGR colour) for each HUD line; same look as the original per-frame putText
+_HUD_LINES = (
+    ("team", (10, 35), 1.2, (0, 255, 0)),
+    ("score", (10, 75), 1.0, (255, 255, 255)),
+    ("time", (10, 115), 1.0, (255, 255, 255)),
+)
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_THICKNESS = 2
+
+
+class HudLayer:
+    """BGRA sprite composited onto each frame with one alpha blend over the top-left ROI.
+    Reads MatchState's immutable snapshot by reference; the ticking timer is derived from it, so a running
+    match costs one sprite rebuild per second and no lock traffic."""
+
+    def __init__(self, state: MatchState = match_state):
+        self._state = state
+        self._snap: StateSnapshot = state.snapshot()
+        self._key: tuple | None = None
+        self._sprite: np.ndarray | None = None  # H x W x 4 (BGRA), drawn on black so BGR is premultiplied
+        self._premult: np.ndarray | None = None  # H x W x 3, contiguous BGR * alpha
+        self._inv_alpha: np.ndarray | None = None  # H x W x 3, 255 - alpha (the mask)
+        self._blend_buf: np.ndarray | None = None
+        self.rebuilds = 0
+        self.state_reads = 0
+
+    def _refresh_state(self) -> None:
+        """Swap in the current snapshot if MatchState changed (reference read, no lock)."""
+        snap = self._state.snapshot()
+        if snap is not self._snap:
+            self._snap = snap
+            self.state_reads += 1
+
+    def _render(self, key: tuple[str, int, int]) -> None:
+        team_display, score, t_elapsed = key
+        texts = {
+            "team": f"{team_display}",
+            "score": f"Score: {score}",
+            "time": f"Time: {t_elapsed // 60:02d}:{t_elapsed % 60:02d}",
+        }
+        width = height = 0
+        for name, (x, y), scale, _ in _HUD_LINES:
+            (w, _h), baseline = cv2.getTextSize(texts[name], _FONT, scale, _THICKNESS)
+            width = max(width, x + w + _THICKNESS)
+            height = max(height, y + baseline + _THICKNESS)
+        sprite = np.zeros((height, width, 4), np.uint8)
+        for name, org, scale, color in _HUD_LINES:
+            cv2.putText(sprite, texts[name], org, _FONT, scale, (*color, 255), _THICKNESS)
+        self._sprite = sprite
+        self._premult = np.ascontiguousarray(sprite[:, :, :3])
+        self._inv_alpha = cv2.merge([255 - sprite[:, :, 3]] * 3)
+        self._blend_buf = np.empty_like(self._premult)
+        self._key = key
+        self.rebuilds += 1
+
+    def composite(self, frame: np.ndarray) -> None:
+        """Draw the HUD onto a BGR frame in place."""
+        self._refresh_state()
+        state = self._snap.state
+        key = (state["team_display"], state["score_total"], self._snap.elapsed_s())
+        if key != self._key:
+            self._render(key)
+        h = min(self._sprite.shape[0], frame.shape[0])
+        w = min(self._sprite.shape[1], frame.shape[1])
+        roi = frame[:h, :w]
+        buf = self._blend_buf[:h, :w]
+        # roi = roi * (1 - alpha) + premultiplied sprite; exact copy where alpha is 0 or 255
+        cv2.multiply(roi, self._inv_alpha[:h, :w], dst=buf, scale=1.0 / 255)
+        cv2.add(buf, self._premult[:h, :w], dst=roi)
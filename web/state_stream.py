@@ -0,0 +1,120 @@
+"""Push channel for match state: MatchState mutations fan out to /api/state/stream (SSE) subscribers as versioned diffs."""
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator
+
+from state.store import MatchState, match_state
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+HEARTBEAT_SEC = 15.0
+
+
+def sse_event(event: str, data: Any, event_id: int | None = None) -> str:
+    """Format one Server-Sent Event."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def state_etag(state: MatchState = match_state) -> str:
+    """ETag for GET /api/state from the current snapshot. The version covers every mutation; while the
+    timer runs the displayed second is part of the tag too, so pollers still see it tick."""
+    snap = state.snapshot()
+    if snap.running_since is None:
+        return f'W/"{snap.version}"'
+    return f'W/"{snap.version}-{snap.elapsed_s()}"'
+
+
+class _Subscriber:
+    """One SSE client. Diffs published while the client is busy are merged into one pending diff, so a
+    slow client costs one dict, not a growing queue."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.wake = asyncio.Event()
+        self.version = 0
+        self.diff: dict[str, Any] = {}
+        self.events: set[str] = set()
+
+    def notify(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.wake.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+
+class StateHub:
+    """Registers one listener on MatchState and fans its diffs out to every connected subscriber.
+    publish_event(name) sends a data-less event (e.g. "leaderboard" after a save) to everyone."""
+
+    def __init__(self, state: MatchState = match_state):
+        self._state = state
+        self._lock = threading.Lock()
+        self._subscribers: set[_Subscriber] = set()
+        state.add_listener(self._on_change)
+
+    def _on_change(self, version: int, diff: dict[str, Any]) -> None:
+        with self._lock:
+            for sub in self._subscribers:
+                sub.version = version
+                sub.diff.update(diff)
+                sub.notify()
+
+    def publish_event(self, name: str) -> None:
+        with self._lock:
+            for sub in self._subscribers:
+                sub.events.add(name)
+                sub.notify()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _take(self, sub: _Subscriber) -> tuple[int, dict[str, Any], set[str]]:
+        with self._lock:
+            sub.wake.clear()
+            out = (sub.version, sub.diff, sub.events)
+            sub.diff, sub.events = {}, set()
+            return out
+
+    async def events(self) -> AsyncIterator[str]:
+        """SSE stream for one client: a full "snapshot" first, then "diff" events carrying only changed
+        keys. Every payload has version and server_time, so clients can tick the timer locally from
+        timer_started_at (offset by server_time - their own clock)."""
+        sub = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+        try:
+            snap = self._state.snapshot()
+            version = snap.version
+            yield sse_event("snapshot", {**snap.as_dict(), "version": version, "server_time": time.time()}, version)
+            while True:
+                try:
+                    await asyncio.wait_for(sub.wake.wait(), HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                new_version, diff, named = self._take(sub)
+                if diff and new_version > version:
+                    version = new_version
+                    yield sse_event("diff", {**diff, "version": version, "server_time": time.time()}, version)
+                for name in sorted(named):
+                    yield sse_event(name, {"version": version})
+        finally:
+            with self._lock:
+                self._subscribers.discard(sub)
+
+
+_hubs: dict[str, StateHub] = {}
+_hubs_lock = threading.Lock()
+
+
+def get_state_hub(state: MatchState = match_state) -> StateHub:
+    """The hub for one arena's MatchState, created on first use."""
+    with _hubs_lock:
+        hub = _hubs.get(state.arena_id)
+        if hub is None:
+            hub = _hubs[state.arena_id] = StateHub(state)
+        return hub
@@ -0,0 +1,65 @@
+/* Live match state for the static pages: /api/state/stream (SSE) with an ETag polling fallback.
+   onState(state) gets the full backend state; t_elapsed_s is ticked locally from timer_started_at.
+   Open a page with ?arena=<id> to follow one track; apiUrl() and the nav links carry it along. */
+const ARENA = new URLSearchParams(window.location.search).get('arena');
+
+function apiUrl(path) {
+  if (!ARENA) return path;
+  return path + (path.includes('?') ? '&' : '?') + 'arena=' + encodeURIComponent(ARENA);
+}
+
+if (ARENA) {
+  document.querySelectorAll('.site-nav a').forEach((a) => { a.href = apiUrl(a.getAttribute('href')); });
+}
+
+function subscribeState(onState, onLeaderboard) {
+  let state = null;
+  let clockOffset = 0;  // server clock - local clock (s)
+  let etag = null;
+  let pollTimer = null;
+  let tickTimer = null;
+
+  function emit() {
+    if (!state) return;
+    if (state.timer_running && state.timer_started_at != null) {
+      const now = Date.now() / 1000 + clockOffset;
+      state.t_elapsed_s = Math.max(0, Math.round(now - state.timer_started_at));
+    }
+    onState(state);
+  }
+
+  function apply(data) {
+    if (data.server_time != null) clockOffset = data.server_time - Date.now() / 1000;
+    state = Object.assign(state || {}, data);
+    emit();
+  }
+
+  async function poll() {
+    try {
+      const r = await fetch(apiUrl('/api/state'), { headers: etag ? { 'If-None-Match': etag } : {} });
+      if (r.status === 304) return;
+      etag = r.headers.get('ETag');
+      apply(await r.json());
+    } catch (e) {}
+  }
+
+  function startPolling() {
+    if (pollTimer) return;
+    pollTimer = setInterval(poll, 500);
+    poll();
+  }
+
+  tickTimer = setInterval(() => { if (state && state.timer_running) emit(); }, 250);
+
+  if (window.EventSource) {
+    const es = new EventSource(apiUrl('/api/state/stream'));
+    es.addEventListener('snapshot', (e) => { state = null; apply(JSON.parse(e.data)); });
+    es.addEventListener('diff', (e) => apply(JSON.parse(e.data)));
+    if (onLeaderboard) es.addEventListener('leaderboard', () => onLeaderboard());
+    es.onopen = () => { if (pollTimer) { clearInterval(pollTimer); pollTimer = null; } };
+    es.onerror = () => { if (es.readyState === EventSource.CLOSED) startPolling(); };
+  } else {
+    startPolling();
+  }
+  return { refresh: poll, stop: () => { clearInterval(tickTimer); if (pollTimer) clearInterval(pollTimer); } };
+}
@@ -0,0 +1,337 @@
+"""Shared camera capture for /stream: one capture + HUD + JPEG worker per video source, fanned out to every viewer.
+Arenas that share a source share the capture; each gets its own HUD."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, NamedTuple
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+from state.store import MatchState, match_state
+from web.hud import HudLayer
+
+MJPEG_MEDIA_TYPE = "multipart/x-mixed-replace; boundary=frame"
+
+
+def mjpeg_part(jpeg: bytes) -> bytes:
+    """Wrap one encoded JPEG as a multipart/x-mixed-replace chunk."""
+    return b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+
+
+class FrameRing:
+    """Fixed-size ring of frames (encoded JPEG bytes, or raw arrays for in-process consumers). The writer
+    never blocks; readers always take the newest frame, so a slow viewer skips frames instead of holding
+    up the others."""
+
+    def __init__(self, size: int = 4):
+        self._slots: list[Any] = [None] * max(1, size)
+        self._seq = 0  # sequence number of the newest frame (0 = nothing published yet)
+        self._closed = False
+        self._cond = threading.Condition()
+        self._async_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def publish(self, data: bytes) -> int:
+        with self._cond:
+            self._seq += 1
+            self._slots[self._seq % len(self._slots)] = data
+            self._cond.notify_all()
+            self._wake_async()
+            return self._seq
+
+    def latest(self) -> tuple[int, bytes | None]:
+        with self._cond:
+            return self._seq, self._slots[self._seq % len(self._slots)]
+
+    def wait_newer(self, seq: int, timeout: float) -> tuple[int, bytes | None]:
+        """Block until a frame newer than seq exists (or timeout / close). Returns (seq, frame) of the newest frame."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self._closed, timeout)
+            return self._seq, self._slots[self._seq % len(self._slots)]
+
+    async def wait_newer_async(self, seq: int, timeout: float) -> tuple[int, bytes | None]:
+        """Async wait_newer: parks on an asyncio.Event set from the worker thread, so no thread is held per reader."""
+        loop = asyncio.get_running_loop()
+        waiter = (loop, asyncio.Event())
+        with self._cond:
+            if self._seq > seq or self._closed:
+                return self._seq, self._slots[self._seq % len(self._slots)]
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        return self.latest()
+
+    def _wake_async(self) -> None:
+        """Caller holds _cond. Event.set must run on the waiter's own loop."""
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def close(self) -> None:
+        """Wake all readers; used when the capture worker exits."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._wake_async()
+
+    def reopen(self) -> None:
+        with self._cond:
+            self._closed = False
+
+
+class StreamTier(NamedTuple):
+    """One encode profile. Viewers asking for the same tier share its encoded frames."""
+    width: int      # output width in px; 0 = camera resolution
+    quality: int    # JPEG quality 10-100
+    fps: float      # max frames per second; 0 = camera rate
+
+
+def make_tier(width: int | None = None, quality: int | None = None, fps: float | None = None) -> StreamTier:
+    """Clamp and normalise viewer-supplied values so near-identical requests collapse onto one tier."""
+    width = 0 if not width else min(max(int(width), 64), 3840) // 16 * 16
+    quality = Settings.STREAM_JPEG_QUALITY if quality is None else quality
+    fps = Settings.STREAM_MAX_FPS if fps is None else fps
+    return StreamTier(width, min(max(int(quality), 10), 100), round(min(max(float(fps), 0.0), 60.0), 1))
+
+
+class _TierEncoder:
+    """Resize + encode state for one tier of one arena's HUD; only touched by the capture worker (plus the
+    subscriber count)."""
+
+    def __init__(self, tier: StreamTier, ring_size: int, hud: HudLayer):
+        self.tier = tier
+        self.hud = hud
+        self.ring = FrameRing(ring_size)
+        self.subscribers = 0
+        self.frames_encoded = 0
+        self._interval = 1.0 / tier.fps if tier.fps > 0 else 0.0
+        self._next_due = 0.0
+        self._resized: np.ndarray | None = None
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, tier.quality]
+        if Settings.STREAM_JPEG_OPTIMIZE:
+            self._params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+
+    def due(self, now: float) -> bool:
+        """Pace to the tier's fps rather than the camera's. A quarter-interval of slack keeps e.g. 15 fps
+        from a 30 fps camera at every other frame despite capture jitter."""
+        if not self._interval:
+            return True
+        if now < self._next_due - 0.25 * self._interval:
+            return False
+        self._next_due = max(self._next_due + self._interval, now)
+        return True
+
+    def encode(self, frame: np.ndarray) -> None:
+        h, w = frame.shape[:2]
+        if self.tier.width and self.tier.width < w:
+            size = (self.tier.width, max(2, round(h * self.tier.width / w)))
+            if self._resized is None or self._resized.shape[1::-1] != size:
+                self._resized = np.empty((size[1], size[0], 3), np.uint8)
+            frame = cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode(".jpg", frame, self._params)
+        if ok:
+            self.ring.publish(jpeg.tobytes())
+            self.frames_encoded += 1
+
+
+# Capture/encode workers run here, never on Starlette's request threadpool or the event loop
+_capture_executor = ThreadPoolExecutor(
+    max_workers=Settings.STREAM_CAPTURE_WORKERS, thread_name_prefix="stream-capture"
+)
+
+
+class FrameBroadcaster:
+    """Owns the VideoCapture for one source. The worker starts with the first viewer and stops once
+    nobody has watched for idle_timeout_sec, so the camera is opened at most once per source.
+    Each frame gets each watched arena's HUD once (arenas sharing a camera each draw on their own copy) and
+    is then encoded once per tier that has viewers. In-process consumers (the vision engine) can take the
+    clean, pre-HUD frames from the raw ring via open_raw()."""
+
+    def __init__(self, source: int | str, ring_size: int = 4, idle_timeout_sec: float = 5.0):
+        self.source = source
+        self.ring_size = ring_size
+        self.idle_timeout_sec = idle_timeout_sec
+        self._lock = threading.Lock()
+        self._huds: dict[int, HudLayer] = {}  # id(MatchState) -> that arena's HUD
+        self._tiers: dict[tuple[HudLayer, StreamTier], _TierEncoder] = {}
+        self.raw = FrameRing(2)
+        self._raw_subscribers = 0
+        self._subscribers = 0
+        self._idle_since: float | None = None
+        self._worker: object | None = None  # token of the running worker; None when stopped
+        self._released = threading.Event()  # set once the last worker has released its capture
+        self._released.set()
+        self.frames_captured = 0
+
+    def _acquire(self, tier: StreamTier, state: MatchState) -> _TierEncoder:
+        with self._lock:
+            hud = self._huds.get(id(state))
+            if hud is None:
+                hud = self._huds[id(state)] = HudLayer(state)
+            enc = self._tiers.get((hud, tier))
+            if enc is None:
+                enc = self._tiers[(hud, tier)] = _TierEncoder(tier, self.ring_size, hud)
+            enc.subscribers += 1
+            self._subscribe_locked()
+            return enc
+
+    def _subscribe_locked(self) -> None:
+        self._subscribers += 1
+        self._idle_since = None
+        if self._worker is None:
+            for e in self._tiers.values():
+                e.ring.reopen()
+            self.raw.reopen()
+            self._worker = token = object()
+            # The old worker clears _worker before it releases the camera; the new one opens it only after
+            prev, self._released = self._released, threading.Event()
+            _capture_executor.submit(self._run, token, prev, self._released)
+
+    def _unsubscribe_locked(self) -> None:
+        self._subscribers = max(0, self._subscribers - 1)
+        if self._subscribers == 0:
+            self._idle_since = time.monotonic()
+
+    def open_raw(self) -> FrameRing:
+        """Subscribe to un-annotated BGR frames (copies, safe to keep). Pair with close_raw()."""
+        with self._lock:
+            self._raw_subscribers += 1
+            self._subscribe_locked()
+            return self.raw
+
+    def close_raw(self) -> None:
+        with self._lock:
+            self._raw_subscribers = max(0, self._raw_subscribers - 1)
+            self._unsubscribe_locked()
+
+    def _release(self, enc: _TierEncoder) -> None:
+        with self._lock:
+            enc.subscribers -= 1
+            if enc.subscribers <= 0:
+                self._tiers.pop((enc.hud, enc.tier), None)
+            self._unsubscribe_locked()
+
+    def _should_exit(self) -> bool:
+        """Called by the worker each frame; clears _worker under the lock so _acquire can restart cleanly."""
+        with self._lock:
+            if self._subscribers == 0 and self._idle_since is not None \
+                    and time.monotonic() - self._idle_since >= self.idle_timeout_sec:
+                self._worker = None
+                return True
+            return False
+
+    def _run(self, token: object, prev_released: threading.Event, released: threading.Event) -> None:
+        cap = None
+        try:
+            prev_released.wait()  # V4L2 / DirectShow refuse a second open of a device still held
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                print(f"[Stream] Could not open video source {self.source!r}")
+                return
+            while not self._should_exit():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames_captured += 1
+                if self._raw_subscribers:
+                    self.raw.publish(frame.copy())  # before the HUD is drawn in place
+                now = time.monotonic()
+                with self._lock:
+                    due = [e for e in self._tiers.values() if e.due(now)]
+                if not due:
+                    continue
+                by_hud: dict[HudLayer, list[_TierEncoder]] = {}
+                for enc in due:
+                    by_hud.setdefault(enc.hud, []).append(enc)
+                for i, (hud, encs) in enumerate(by_hud.items()):
+                    # The last HUD is drawn on the captured frame itself, any others on a copy
+                    canvas = frame if i == len(by_hud) - 1 else frame.copy()
+                    hud.composite(canvas)
+                    for enc in encs:
+                        enc.encode(canvas)
+        except Exception as e:
+            print(f"[Stream] Error: {e}")
+        finally:
+            if cap is not None:
+                cap.release()
+            released.set()
+            with self._lock:
+                # A new viewer may already have started a replacement worker; leave its rings open
+                if self._worker is token:
+                    self._worker = None
+                if self._worker is None:
+                    for enc in self._tiers.values():
+                        enc.ring.close()
+                    self.raw.close()
+
+    async def aframes(self, tier: StreamTier | None = None, state: MatchState = match_state) -> AsyncIterator[bytes]:
+        """MJPEG parts for one viewer, with state's HUD. Only awaits the tier's ring, so the viewer costs no
+        thread; the next frame is fetched only after the previous one was sent, and whatever was missed
+        meanwhile is skipped."""
+        enc = self._acquire(tier or make_tier(), state)
+        try:
+            seq = 0
+            while True:
+                seq_new, jpeg = await enc.ring.wait_newer_async(seq, timeout=1.0)
+                if seq_new > seq and jpeg is not None:
+                    seq = seq_new
+                    yield mjpeg_part(jpeg)
+                elif enc.ring.closed:
+                    return
+        finally:
+            self._release(enc)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "source": self.source,
+                "subscribers": self._subscribers,
+                "raw_subscribers": self._raw_subscribers,
+                "running": self._worker is not None,
+                "frames_captured": self.frames_captured,
+                "tiers": [
+                    {**e.tier._asdict(), "subscribers": e.subscribers, "frames_encoded": e.frames_encoded}
+                    for e in self._tiers.values()
+                ],
+                "huds": len(self._huds),
+                "hud_rebuilds": sum(h.rebuilds for h in self._huds.values()),
+                "hud_state_reads": sum(h.state_reads for h in self._huds.values()),
+            }
+
+
+_broadcasters: dict[int | str, FrameBroadcaster] = {}
+_registry_lock = threading.Lock()
+
+
+def get_broadcaster(source: int | str | None = None) -> FrameBroadcaster:
+    """Return the shared broadcaster for a video source (default Settings.VIDEO_SOURCE), creating it on first use.
+    One per source, whichever arenas use it: the viewer picks the HUD (aframes(state=...))."""
+    if source is None:
+        source = Settings.VIDEO_SOURCE
+    with _registry_lock:
+        b = _broadcasters.get(source)
+        if b is None:
+            b = FrameBroadcaster(
+                source,
+                ring_size=Settings.STREAM_RING_SIZE,
+                idle_timeout_sec=Settings.STREAM_IDLE_TIMEOUT_SEC,
+            )
+            _broadcasters[source] = b
+        return b